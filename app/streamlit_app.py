@@ -2,16 +2,13 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
-from PIL import Image
-import torch
-import torch.nn as nn
-from torchvision import models
-import numpy as np
-import matplotlib.pyplot as plt
 
-from src.data_transforms import val_transforms
-from src.utils.image_processing import process_ecg_image
+# The ML stack (torch, torchvision, OpenCV, pandas, matplotlib) is deliberately
+# not imported here: the Home tab must paint without it. It is loaded on a
+# background thread by start_runtime() below.
 
 # ──────────────────────────────────────────────────────────────
 # Page Configuration
@@ -686,17 +683,104 @@ with tab_home:
 # ──────────────────────────────────────────────────────────────
 # ECG Disease Detection Tab
 with tab_ecg:
+    def load_runtime():
+        # Runs off the script thread: heavy imports first, then the model
+        import matplotlib.figure  # noqa: F401
+        from src.backends import load_backend
+        from src.inference import InferenceClient, LocalPredictor
+        from src.runtime import InferenceLimiter, configure_threads
+        from src.utils.image_processing import process_ecg_image  # noqa: F401
+        from src.utils.quality import assess_quality  # noqa: F401
+        from src.utils.rendering import chart_frame  # noqa: F401
+        from src.utils.signal_io import signals_to_bytes  # noqa: F401
+        from src.utils.result_cache import ResultCache
+
+        # Thread pools are sized before the first forward pass or OpenCV call
+        config = configure_threads()
+
+        # With CARDIOSCAN_INFERENCE_URL set, forward passes go to the shared
+        # micro-batching service (src/serve.py) instead of an in-process model;
+        # otherwise run locally on the backend chosen by CARDIOSCAN_BACKEND
+        url = os.environ.get("CARDIOSCAN_INFERENCE_URL")
+        if url:
+            predictor = InferenceClient(url)
+        else:
+            limiter = InferenceLimiter(config["max_concurrent_inference"])
+            predictor = LocalPredictor(load_backend(), limiter)
+
+        # Shared by all sessions; set CARDIOSCAN_CACHE_DIR to keep results across restarts
+        max_mb = int(os.environ.get("CARDIOSCAN_CACHE_MB", "256"))
+        disk_mb = int(os.environ.get("CARDIOSCAN_CACHE_DISK_MB", "1024"))
+        result_cache = ResultCache(max_mb * 1024 * 1024, os.environ.get("CARDIOSCAN_CACHE_DIR"),
+                                   disk_mb * 1024 * 1024)
+        return predictor, result_cache, config
+
     @st.cache_resource
-    def load_model():
-        m = models.resnet18(weights="IMAGENET1K_V1")
-        m.fc = nn.Linear(m.fc.in_features, 4)
-        m.load_state_dict(torch.load("models/best_model.pth", map_location="cpu"))
-        m.eval()
-        return m
+    def start_runtime():
+        # Started once per process, after the Home tab has already been sent
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="warmup").submit(load_runtime)
+
+    # Rendered waveforms are cached per upload; the leading underscore keeps
+    # Streamlit from hashing the signals, the cache key already identifies them
+    @st.cache_data(max_entries=64)
+    def signal_chart_frame(cache_key, _signals):
+        from src.utils.rendering import chart_frame
+        return chart_frame(_signals, [f"Lead {i+1}" for i in range(len(_signals))])
+
+    @st.cache_data(max_entries=16)
+    def signal_figure_png(cache_key, _signals):
+        from src.utils.rendering import render_signals_png
+        return render_signals_png(_signals, [f"Lead {i+1}" for i in range(len(_signals))])
+
+    @st.cache_data(max_entries=16)
+    def signal_parquet(cache_key, record, _ecg):
+        from src.utils.image_processing import LEAD_NAMES
+        from src.utils.signal_io import signals_to_bytes
+        return signals_to_bytes(_ecg.signals, LEAD_NAMES, _ecg.sample_rate, record,
+                                coverage=_ecg.coverage)
 
-    class_names = ['Abnormal Heartbeat', 'History of MI', 'Myocardial Infarction', 'Normal']
-    class_colors = ['#E9C46A', '#F4A261', '#E63946', '#2A9D8F']
-    model = load_model()
+    # Redrawn on its own timer, so the page around it is not rerun per frame
+    @st.fragment(run_every=0.25)
+    def live_view(analyzer):
+        class_names = analyzer.predictor.class_names
+        state = analyzer.snapshot()
+        if state["error"]:
+            st.error(state["error"])
+            return
+
+        col_frame, col_result = st.columns([3, 2])
+        with col_frame:
+            if state["frame"] is not None:
+                st.image(state["frame"], caption="Live camera", use_container_width=True)
+        with col_result:
+            if state["ok"]:
+                st.success("ECG in frame - analyzing")
+            else:
+                st.warning(state["reason"])
+            if state["probs"] is not None:
+                idx = int(state["probs"].argmax())
+                st.metric("Latest prediction", class_names[idx], f"{state['probs'][idx] * 100:.1f}% confidence",
+                          delta_color="off")
+
+            st.caption(f"Camera {state['capture_fps']:.1f} fps · analyzed {state['analysis_fps']:.1f} fps · "
+                       f"{state['dropped']} stale frames dropped")
+            st.caption(" · ".join(f"{stage} {ms:.1f} ms" for stage, ms in state["latency"].items()))
+            if state.get("ecg") is not None:
+                st.caption("process: " + " · ".join(
+                    f"{step} {ms:.1f} ms" for step, ms in state["ecg"].timings.items()))
+
+    runtime = start_runtime()
+    if runtime.done() and runtime.exception() is not None:
+        # Let the next rerun retry a failed load (e.g. checkpoint not there yet)
+        start_runtime.clear()
+
+    def class_colors(n):
+        # The theme's four colors, then golden-ratio spaced hues for checkpoints
+        # with more classes; always #rrggbb, the heatmap appends an alpha byte
+        import colorsys
+        palette = ['#E9C46A', '#F4A261', '#E63946', '#2A9D8F']
+        extra = [colorsys.hsv_to_rgb((k * 0.618034 + 0.1) % 1.0, 0.55, 0.9) for k in range(max(0, n - len(palette)))]
+        return (palette + ['#%02X%02X%02X' % tuple(round(c * 255) for c in rgb) for rgb in extra])[:n]
 
     # Upload Section Header
     st.markdown("""
@@ -709,11 +793,18 @@ with tab_ecg:
     # Upload method selection
     upload_method = st.radio(
         "Select input method:",
-        ("📁 Upload from Computer", "📷 Capture from Camera"),
+        ("📁 Upload from Computer", "📷 Capture from Camera", "🎥 Live Camera Stream"),
         horizontal=True
     )
 
     uploaded_file = None
+
+    # Leaving live mode (or turning it off) releases this session's hold on the
+    # shared analyzer; sessions that just disappear are caught by its idle timeout
+    live_on = upload_method == "🎥 Live Camera Stream" and st.session_state.get("live_on", False)
+    if not live_on and "live_analyzer" in st.session_state:
+        from src.utils.live import release_analyzer
+        release_analyzer(st.session_state.pop("live_analyzer"))
     
     if upload_method == "📁 Upload from Computer":
         uploaded_file = st.file_uploader(
@@ -723,9 +814,53 @@ with tab_ecg:
         )
     elif upload_method == "📷 Capture from Camera":
         uploaded_file = st.camera_input("Capture an ECG image using your camera")
+    elif upload_method == "🎥 Live Camera Stream":
+        st.info("Live mode reads a camera attached to the **server running CardioScan**, not the camera "
+                 "of this browser or device. To use your own camera, pick **Capture from Camera**.")
+        st.toggle("Start live analysis on the server camera", key="live_on",
+                  help="Opens the server's camera (CARDIOSCAN_CAMERA selects another device or a stream URL); "
+                       "all sessions share it, and it closes when nobody is watching")
+        if live_on:
+            if not runtime.done():
+                with st.spinner("⏳ Loading AI model..."):
+                    runtime.result()
+            held = st.session_state.get("live_analyzer")
+            if held is None or not held.running:
+                from src.data_transforms import val_transforms
+                from src.utils.live import acquire_analyzer, release_analyzer
+                if held is not None:
+                    # Stopped by its idle timeout (e.g. this tab was in the background)
+                    release_analyzer(held)
+                predictor = runtime.result()[0]
+                source = os.environ.get("CARDIOSCAN_CAMERA", "0")
+                source = int(source) if source.isdigit() else source
+                st.session_state["live_analyzer"] = acquire_analyzer(predictor, val_transforms, source)
+            live_view(st.session_state["live_analyzer"])
 
     # Continue if file is uploaded or captured
     if uploaded_file:
+        if not runtime.done():
+            with st.spinner("⏳ Loading AI model..."):
+                runtime.result()
+        predictor, result_cache, _ = runtime.result()
+        # Labels come with the loaded model, so a checkpoint trained on other classes is shown correctly
+        class_names = predictor.class_names
+        colors = class_colors(len(class_names))
+
+        # Already imported by the warm-up thread, so these are cheap
+        import numpy as np
+        from src.data_transforms import val_transforms
+        from src.utils.decoding import DecodedImage
+        from src.utils.image_processing import DECODE_SIZE, LEAD_NAMES, process_ecg_image, processing_signature
+        from src.utils.quality import assess_quality
+        from src.utils.result_cache import make_key
+
+        # Repeat uploads (and plain reruns) are served from the result cache;
+        # entries from another model, code version or decode budget never match
+        data = uploaded_file.getvalue()
+        cache_key = make_key(data, predictor.fingerprint, processing_signature())
+        cached = result_cache.get(cache_key)
+
         st.markdown("""
         <div class="section-header">
             <div class="section-header-icon">🖼️</div>
@@ -733,11 +868,28 @@ with tab_ecg:
         </div>
         """, unsafe_allow_html=True)
         
-        st.image(uploaded_file, caption="Original ECG Image", use_container_width=True)
+        st.image(data, caption="Original ECG Image", use_container_width=True)
 
         # Process image
-        with st.spinner("🔄 Processing ECG image..."):
-            df, gray, leads = process_ecg_image(uploaded_file)
+        if cached is None:
+            # Decode once, only as large as processing needs, and share the
+            # result with processing and inference
+            decoded = DecodedImage.from_file(data, DECODE_SIZE)
+
+            # Cheap quality gate: don't spend segmentation and inference on
+            # captures that can't give a meaningful result
+            quality = assess_quality(decoded.gray)
+            if not quality.ok:
+                st.error(f"⚠️ This image can't be analyzed reliably: {quality.reason}.")
+                st.caption(" · ".join(f"{k.replace('_', ' ')} {v:.3g}" for k, v in quality.metrics.items())
+                           + f" · checked in {quality.elapsed_ms:.1f} ms")
+                if not st.checkbox("Analyze anyway"):
+                    st.stop()
+
+            with st.spinner("🔄 Processing ECG image..."):
+                ecg = process_ecg_image(decoded)
+        else:
+            ecg = cached["ecg"]
 
         # Processing Steps
         st.markdown("""
@@ -747,13 +899,17 @@ with tab_ecg:
         </div>
         """, unsafe_allow_html=True)
 
-        with st.expander("🖤 Step 1: Grayscale Conversion", expanded=False):
+        with st.expander("🖤 Step 1: Grid Removal & Lead Localization", expanded=False):
             st.markdown("""
             <div class="card-text" style="margin-bottom: 1rem;">
-                Converting to grayscale removes color information and focuses on the ECG waveform intensity patterns.
+                The background grid is filtered out and the lead rows are located on the page, so only the
+                ECG waveform intensity patterns remain, arranged in the standard 3x4 layout.
             </div>
             """, unsafe_allow_html=True)
-            st.image(gray, caption="Grayscale ECG", use_container_width=True, clamp=True, channels="GRAY")
+            st.image(ecg.gray, caption="Grid-suppressed ECG", use_container_width=True, clamp=True, channels="GRAY")
+            if ecg.rhythm_strip is not None:
+                st.image(ecg.rhythm_strip, caption="Rhythm strip", use_container_width=True, clamp=True, channels="GRAY")
+            st.caption(" · ".join(f"{step} {ms:.1f} ms" for step, ms in ecg.timings.items()))
 
         with st.expander("🧩 Step 2: 12-Lead Extraction", expanded=False):
             st.markdown("""
@@ -762,41 +918,29 @@ with tab_ecg:
             </div>
             """, unsafe_allow_html=True)
             cols = st.columns(4)
-            lead_names = ['I', 'II', 'III', 'aVR', 'aVL', 'aVF', 'V1', 'V2', 'V3', 'V4', 'V5', 'V6']
-            for i, img in enumerate(leads):
+            for i, img in enumerate(ecg.leads):
                 with cols[i % 4]:
-                    st.image(img, caption=f"Lead {lead_names[i] if i < len(lead_names) else i+1}", use_container_width=True, clamp=True, channels="GRAY")
+                    st.image(img, caption=f"Lead {LEAD_NAMES[i] if i < len(LEAD_NAMES) else i+1}", use_container_width=True, clamp=True, channels="GRAY")
 
         with st.expander("📈 Step 3: 1D Signal Extraction", expanded=False):
             st.markdown("""
             <div class="card-text" style="margin-bottom: 1rem;">
-                Waveforms are extracted as normalized 1D signals for detailed signal analysis.
+                Each lead's waveform is traced column by column and expressed as amplitude above its baseline.
             </div>
             """, unsafe_allow_html=True)
             
-            # Custom styled matplotlib plot
-            plt.style.use('dark_background')
-            fig, ax = plt.subplots(figsize=(12, 6))
-            fig.patch.set_facecolor('#0D1B2A')
-            ax.set_facecolor('#0D1B2A')
-            
-            colors = plt.cm.rainbow(np.linspace(0, 1, 12))
-            for i in range(12):
-                ax.plot(df[f"Lead_{i+1}"], label=f"Lead {i+1}", color=colors[i], alpha=0.8, linewidth=1.2)
-            
-            ax.legend(ncol=6, fontsize="small", loc='upper center', bbox_to_anchor=(0.5, -0.1))
-            ax.set_xlabel("Time", color='#A8DADC', fontsize=11)
-            ax.set_ylabel("Normalized Amplitude", color='#A8DADC', fontsize=11)
-            ax.tick_params(colors='#A8DADC')
-            ax.spines['bottom'].set_color('#457B9D')
-            ax.spines['left'].set_color('#457B9D')
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            ax.grid(True, alpha=0.2, color='#457B9D')
-            
-            plt.tight_layout()
-            st.pyplot(fig)
-            plt.close()
+            # Decimated native chart; the chart data is cached per upload
+            st.line_chart(signal_chart_frame(cache_key, ecg.signals), x_label="Time",
+                          y_label="Normalized Amplitude", use_container_width=True)
+
+            # Matplotlib is only used for the high-resolution export
+            if st.checkbox("Prepare high-resolution figure for download", key="export_figure"):
+                st.download_button(
+                    "⬇️ Download waveform figure (PNG)",
+                    data=signal_figure_png(cache_key, ecg.signals),
+                    file_name="ecg_signals.png",
+                    mime="image/png",
+                )
 
         with st.expander("🧮 Step 4: Signal Data Table", expanded=False):
             st.markdown("""
@@ -804,7 +948,15 @@ with tab_ecg:
                 Tabular view of extracted signal values for each lead.
             </div>
             """, unsafe_allow_html=True)
-            st.dataframe(df.head(20), use_container_width=True)
+            st.dataframe(ecg.to_frame().head(20), use_container_width=True)
+            st.download_button(
+                "⬇️ Download signals (Parquet)",
+                data=signal_parquet(cache_key, uploaded_file.name, ecg),
+                file_name=f"{os.path.splitext(uploaded_file.name)[0]}_signals.parquet",
+                mime="application/vnd.apache.parquet",
+            )
+            st.caption("All 12 leads as int16 with per-lead scale factors; "
+                       "read back with `src.utils.signal_io.read_signals`.")
 
         # Prediction Section
         st.markdown("""
@@ -814,12 +966,12 @@ with tab_ecg:
         </div>
         """, unsafe_allow_html=True)
         
-        with st.spinner("🔬 Analyzing ECG with AI..."):
-            img = Image.open(uploaded_file).convert("RGB")
-            tensor = val_transforms(img).unsqueeze(0)
-            with torch.no_grad():
-                out = model(tensor)
-                probs = torch.softmax(out[0], dim=0).detach().numpy()
+        if cached is None:
+            with st.spinner("🔬 Analyzing ECG with AI..."):
+                probs = predictor.predict(val_transforms(decoded.image))
+            result_cache.put(cache_key, {"ecg": ecg, "probs": probs})
+        else:
+            probs = cached["probs"]
 
         idx = np.argmax(probs)
         conf = probs[idx] * 100
@@ -844,7 +996,7 @@ with tab_ecg:
         with st.expander("📊 Detailed Probability Breakdown", expanded=True):
             for i, name in enumerate(class_names):
                 prob_pct = probs[i] * 100
-                bar_color = class_colors[i]
+                bar_color = colors[i]
                 st.markdown(f"""
                 <div class="prob-bar-container">
                     <div class="prob-label">
@@ -857,6 +1009,40 @@ with tab_ecg:
                 </div>
                 """, unsafe_allow_html=True)
         
+        # Per-lead view: every lead crop classified on its own, in one batch
+        with st.expander("🫀 Per-Lead Analysis", expanded=False):
+            st.markdown("""
+            <div class="card-text" style="margin-bottom: 1rem;">
+                Classifies each of the 12 lead crops separately in a single batched pass and shows
+                which leads drive the decision.
+            </div>
+            """, unsafe_allow_html=True)
+            if st.checkbox("Run per-lead classification"):
+                entry = result_cache.get(cache_key) or {"ecg": ecg, "probs": probs}
+                if "lead_probs" not in entry:
+                    from src.inference import classify_leads
+                    with st.spinner("🔬 Classifying individual leads..."):
+                        entry["lead_probs"], entry["lead_summary"] = classify_leads(predictor, ecg.leads)
+                    result_cache.put(cache_key, entry)
+                lead_probs, lead_summary = entry["lead_probs"], entry["lead_summary"]
+
+                agg_idx = int(np.argmax(lead_summary))
+                st.markdown(f"**Aggregated per-lead decision:** {class_names[agg_idx]} "
+                            f"({lead_summary[agg_idx] * 100:.1f}%, mean over 12 leads)")
+                shown = st.selectbox("Heatmap class", class_names, index=agg_idx)
+                c = class_names.index(shown)
+                color = colors[c]
+                cells = "".join(f"""
+                    <div style="background: {color}{int(lead_probs[i, c] * 255):02x}; border: 1px solid {color};
+                                border-radius: 8px; padding: 0.8rem; text-align: center;">
+                        <div style="color: #F1FAEE; font-weight: 600;">{LEAD_NAMES[i]}</div>
+                        <div style="color: #F1FAEE; font-family: 'Space Mono', monospace;">{lead_probs[i, c] * 100:.1f}%</div>
+                    </div>""" for i in range(len(LEAD_NAMES)))
+                st.markdown(f"""
+                <div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 0.5rem;">{cells}</div>
+                """, unsafe_allow_html=True)
+                st.caption(f"Probability of {shown} for each lead, laid out as on the printout.")
+
         # Recommendation based on result
         if is_warning:
             st.markdown("""
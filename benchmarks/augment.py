@@ -0,0 +1,74 @@
+# benchmarks/augment.py
+
+import sys
+import os
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import argparse
+import json
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+
+from benchmarks.synthetic import synthetic_ecg
+from src.data_transforms import BatchAugment, train_transforms
+from src.dataset_cache import CACHE_SIZE
+from src.runtime import configure_threads
+
+def measure(fn, images, repeat, warmup=1):
+    """Images per second of ``fn`` over ``repeat`` timed runs."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return images / float(np.median(times))
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of per-image PIL vs. batched tensor augmentation")
+    parser.add_argument("--batch-size",  type=int, default=32)
+    parser.add_argument("--source-size", type=str, default="2200x1700",
+                        help="Resolution of the original images as WIDTHxHEIGHT")
+    parser.add_argument("--cache-size",  type=int, default=CACHE_SIZE,
+                        help="Resolution of pre-decoded images (see src.dataset_cache)")
+    parser.add_argument("--repeat",      type=int, default=5)
+    parser.add_argument("--output",      type=str, default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    configure_threads()
+    w, h = (int(v) for v in args.source_size.split("x"))
+    n = args.batch_size
+    source = [Image.fromarray(synthetic_ecg(w, h, seed=i)) for i in range(min(n, 8))]
+    source = [source[i % len(source)] for i in range(n)]
+    cached = [img.resize((args.cache_size, args.cache_size), Image.BILINEAR) for img in source]
+    batch = torch.from_numpy(np.stack([np.asarray(img) for img in cached])).permute(0, 3, 1, 2).contiguous()
+    augment = BatchAugment()
+
+    cases = [
+        (f"pil @ {w}x{h}",  "train_transforms per image, original resolution",
+         lambda: torch.stack([train_transforms(img) for img in source])),
+        (f"pil @ {args.cache_size}", "train_transforms per image, cached resolution",
+         lambda: torch.stack([train_transforms(img) for img in cached])),
+        (f"batch @ {args.cache_size}", "BatchAugment on a uint8 batch",
+         lambda: augment(batch)),
+    ]
+
+    results = []
+    print(f"{'pipeline':<22s}{'images/s':>12s}{'speedup':>10s}  description")
+    for name, description, fn in cases:
+        rate = measure(fn, n, args.repeat)
+        results.append({"pipeline": name, "description": description, "images_per_sec": rate})
+        print(f"{name:<22s}{rate:12.1f}{rate / results[0]['images_per_sec']:9.1f}x  {description}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"batch_size": n, "threads": torch.get_num_threads(), "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/importtime.py
+
+import sys
+import os
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+
+APP = os.path.join(ROOT, "app", "streamlit_app.py")
+
+def app_imports(function=None, path=APP):
+    """Modules the app imports at module level (before first paint), or inside
+    ``function``, read from its source so the profile follows the app."""
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    if function is None:
+        nodes = tree.body
+    else:
+        defs = [node for node in ast.walk(tree) if isinstance(node, ast.FunctionDef) and node.name == function]
+        if not defs:
+            raise ValueError(f"{path} has no function {function}()")
+        nodes = ast.walk(defs[0])
+    modules = []
+    for node in nodes:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names = [node.module]
+        else:
+            continue
+        modules.extend(name for name in names if name not in modules)
+    return modules
+
+# What the app pays before first paint vs. what the warm-up thread pays later
+DEFAULT_TARGETS = {
+    "first_paint": app_imports(),
+    "ecg_runtime": app_imports("load_runtime"),
+}
+
+def profile_imports(modules, exclude=(), preload=()):
+    """Run ``python -X importtime`` in a fresh interpreter and parse its report.
+
+    Returns (total_us, {top-level package: cumulative us}); packages in
+    ``exclude`` (interpreter start-up, earlier stages) are left out. Modules in
+    ``preload`` are imported first, so anything they pull in is not counted
+    again.
+    """
+    code = "; ".join(f"import {m}" for m in [*preload, *modules])
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+
+    packages = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented; only top-level entries add up to the total
+        if not name.startswith("  "):
+            pkg = name.strip().split(".")[0]
+            if pkg not in exclude:
+                packages[pkg] = packages.get(pkg, 0) + int(cumulative)
+    return sum(packages.values()), packages
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of the app's startup stages")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Fresh interpreters per stage; the median is reported")
+    parser.add_argument("--top",    type=int, default=10)
+    parser.add_argument("--output", type=str, default=None, help="Optional JSON result file")
+    args = parser.parse_args()
+
+    # Each stage runs on top of the previous ones, as in the app
+    excluded = set(profile_imports([])[1])
+    preload = []
+    results = {}
+    for stage, modules in DEFAULT_TARGETS.items():
+        runs = [profile_imports(modules, excluded, preload) for _ in range(args.repeat)]
+        total_ms = statistics.median(r[0] for r in runs) / 1000.0
+        # Per-package breakdown from the median run
+        _, packages = sorted(runs, key=lambda r: r[0])[len(runs) // 2]
+        top = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+
+        print(f"\n[{stage}] {', '.join(modules)}")
+        print(f"  total: {total_ms:8.1f} ms")
+        for pkg, us in top:
+            print(f"  {pkg:30s}{us / 1000.0:8.1f} ms")
+        results[stage] = {"modules": modules, "total_ms": total_ms,
+                          "packages_ms": {pkg: us / 1000.0 for pkg, us in top}}
+        excluded.update(packages)
+        preload.extend(modules)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
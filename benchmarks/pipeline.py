@@ -0,0 +1,260 @@
+# benchmarks/pipeline.py
+
+import sys
+import os
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+
+STAGES = ("decode", "process", "transform", "forward", "end_to_end")
+
+# ── Measurement (runs in a fresh interpreter per stage) ──────────────────
+def case_name(case):
+    grid = "grid" if case["grid"] else "nogrid"
+    mode = case.get("mode", "RGB")
+    # RGB cases keep their original names so older result files still compare
+    suffix = "" if mode == "RGB" else f"-{mode.replace(';', '')}"
+    return f"{case['width']}x{case['height']}-{case['format']}-{grid}-noise{case['noise']:g}{suffix}"
+
+def build_stage(stage, image_path, backend_name, model_path, batch_size):
+    """Return (fn, items per call) timing one ``stage`` of the upload path.
+
+    torch and torchvision are only imported by the stages that use them, so
+    decode and process run in an interpreter without them, as in extraction
+    workers, and their memory is not buried under the framework's.
+    """
+    from src.utils.decoding import DecodedImage
+    from src.utils.image_processing import DECODE_SIZE, process_ecg_image
+
+    if stage == "forward":
+        import torch
+        from src.backends import load_backend
+        from src.data_transforms import IMG_SIZE
+        backend = load_backend(backend_name, model_path)
+        batch = torch.randn(batch_size, 3, IMG_SIZE, IMG_SIZE)
+        return (lambda: backend.predict(batch)), batch_size
+
+    with open(image_path, "rb") as f:
+        data = f.read()
+    if stage == "decode":
+        return (lambda: DecodedImage.from_file(data, DECODE_SIZE)), 1
+
+    # Later stages start from an already decoded upload
+    decoded = DecodedImage.from_file(data, DECODE_SIZE)
+    if stage == "process":
+        # A fresh wrapper per call so cached array views are rebuilt, as for a new upload
+        return (lambda: process_ecg_image(DecodedImage(data, decoded.image, decoded.full_size))), 1
+    if stage == "transform":
+        from src.data_transforms import val_transforms
+        return (lambda: val_transforms(decoded.image)), 1
+    if stage == "end_to_end":
+        from src.backends import load_backend
+        from src.data_transforms import val_transforms
+        from src.inference import LocalPredictor
+        predictor = LocalPredictor(load_backend(backend_name, model_path))
+
+        def upload_to_probabilities():
+            # The app's path for an uncached upload
+            image = DecodedImage.from_file(data, DECODE_SIZE)
+            process_ecg_image(image)
+            return predictor.predict(val_transforms(image.image))
+        return upload_to_probabilities, 1
+    raise ValueError(f"Unknown stage '{stage}'")
+
+def run_stage(stage, case, image_path, backend_name, model_path, batch_size, repeat, warmup):
+    import numpy as np
+
+    from src.runtime import configure_threads, peak_rss_mb
+    configure_threads()
+
+    fn, items = build_stage(stage, image_path, backend_name, model_path, batch_size)
+    baseline = peak_rss_mb()
+    for _ in range(warmup):
+        fn()
+
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000.0)
+
+    lat = np.array(latencies)
+    peak = peak_rss_mb()
+    return {
+        "stage": stage,
+        "case": case_name(case) if stage != "forward" else f"batch{batch_size}",
+        "params": case if stage != "forward" else {"batch_size": batch_size},
+        "repeat": repeat,
+        "mean_ms": float(lat.mean()),
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p95_ms": float(np.percentile(lat, 95)),
+        "min_ms": float(lat.min()),
+        "throughput_per_s": items * 1000.0 / float(lat.mean()),
+        "peak_rss_mb": peak,
+        "rss_delta_mb": peak - baseline,
+    }
+
+def environment():
+    import torch
+    from src.runtime import load_runtime_config
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        commit += "-dirty" if dirty else ""
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "runtime": load_runtime_config(),
+    }
+
+# ── Comparison ───────────────────────────────────────────────────────────
+def compare(base_path, new_path, threshold, mem_floor=5.0):
+    """Print per-(stage, case) changes; returns the number of regressions.
+
+    Memory is compared on each stage's own growth (``rss_delta_mb``) rather
+    than the process peak, which is dominated by imports; growth changes
+    below ``mem_floor`` MB are noise and never count as regressions.
+    """
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    base_results = {(r["stage"], r["case"]): r for r in base["results"]}
+
+    print(f"Base: {base['environment'].get('commit')}  New: {new['environment'].get('commit')}  "
+          f"(regression threshold {threshold:.0%})\n")
+    print(f"{'stage':<12s}{'case':<36s}{'p50 ms':>18s}{'Δ':>8s}{'RSS growth MB':>20s}{'Δ':>8s}")
+    regressions = 0
+    for r in new["results"]:
+        old = base_results.get((r["stage"], r["case"]))
+        if old is None:
+            print(f"{r['stage']:<12s}{r['case']:<36s}{'(new)':>18s}")
+            continue
+        d_lat = r["p50_ms"] / old["p50_ms"] - 1.0
+        grown = r["rss_delta_mb"] - old["rss_delta_mb"]
+        d_mem = grown / max(old["rss_delta_mb"], mem_floor)
+        flag = ""
+        if d_lat > threshold or (d_mem > threshold and grown > mem_floor):
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{r['stage']:<12s}{r['case']:<36s}"
+              f"{old['p50_ms']:8.1f} →{r['p50_ms']:8.1f}{d_lat:+8.0%}"
+              f"{old['rss_delta_mb']:9.1f} →{r['rss_delta_mb']:9.1f}{d_mem:+8.0%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency, throughput and peak memory of the ECG pipeline")
+    parser.add_argument("--stages",      type=str,   nargs="+", default=list(STAGES), choices=STAGES)
+    parser.add_argument("--sizes",       type=str,   nargs="+", default=["1600x1200", "4000x3000"],
+                        help="Synthetic image sizes as WIDTHxHEIGHT")
+    parser.add_argument("--formats",     type=str,   nargs="+", default=["png", "jpeg"],
+                        choices=["png", "jpeg", "tiff"])
+    parser.add_argument("--modes",       type=str,   nargs="+", default=["RGB"],
+                        help="Stored image modes (RGB, L, P, 1, I;16); JPEG cases are only generated for RGB and L")
+    parser.add_argument("--quality",     type=int,   default=90, help="JPEG quality")
+    parser.add_argument("--noise",       type=float, nargs="+", default=[0.0],
+                        help="Pixel noise std (0-255) of the synthetic images")
+    parser.add_argument("--no-grid",     action="store_true", help="Render images without ECG paper grid")
+    parser.add_argument("--batch-sizes", type=int,   nargs="+", default=[1, 16],
+                        help="Batch sizes for the forward stage")
+    parser.add_argument("--backend",     type=str,   default=None,
+                        help="Inference backend (default: $CARDIOSCAN_BACKEND or eager)")
+    parser.add_argument("--model-path",  type=str,   default=None)
+    parser.add_argument("--random-weights", action="store_true",
+                        help="Benchmark an untrained model when no checkpoint is available")
+    parser.add_argument("--repeat",      type=int,   default=20)
+    parser.add_argument("--warmup",      type=int,   default=3)
+    parser.add_argument("--output",      type=str,   default="benchmark_results.json")
+    parser.add_argument("--compare",     type=str,   nargs=2, metavar=("BASE", "NEW"),
+                        help="Compare two result files instead of running")
+    parser.add_argument("--threshold",   type=float, default=0.10,
+                        help="Relative slowdown or memory growth reported as a regression")
+    parser.add_argument("--mem-floor",   type=float, default=5.0,
+                        help="Changes in a stage's memory growth below this many MB are ignored")
+    parser.add_argument("--worker",      type=str,   default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold, args.mem_floor) else 0)
+
+    if args.worker:
+        # One stage per interpreter, so peak RSS belongs to that stage alone
+        spec = json.loads(args.worker)
+        print(json.dumps(run_stage(spec["stage"], spec["case"], spec["image"], args.backend,
+                                   args.model_path, spec["batch_size"], args.repeat, args.warmup)))
+        return
+
+    workdir = tempfile.mkdtemp(prefix="cardioscan-bench-")
+    model_path = args.model_path
+    if args.random_weights:
+        from src.model import CLASS_NAMES, build_model, save_checkpoint
+        model_path = os.path.join(workdir, "random.pth")
+        save_checkpoint(build_model(len(CLASS_NAMES)), model_path, CLASS_NAMES)
+
+    cases = [
+        {"width": int(size.split("x")[0]), "height": int(size.split("x")[1]),
+         "format": fmt, "quality": args.quality, "noise": noise, "grid": not args.no_grid, "mode": mode}
+        for size in args.sizes for fmt in args.formats for noise in args.noise for mode in args.modes
+        if fmt != "jpeg" or mode in ("RGB", "L")
+    ]
+    # Images are generated once, here, so workers only pay for reading the file
+    from benchmarks.synthetic import encode, synthetic_ecg
+    images = {}
+    for case in cases:
+        path = os.path.join(workdir, f"{case_name(case)}.{case['format']}")
+        rgb = synthetic_ecg(case["width"], case["height"], grid=case["grid"], noise=case["noise"])
+        with open(path, "wb") as f:
+            f.write(encode(rgb, case["format"], case["quality"], case["mode"]))
+        images[case_name(case)] = path
+
+    specs = []
+    for stage in args.stages:
+        if stage == "forward":
+            specs.extend({"stage": stage, "case": None, "image": None, "batch_size": b}
+                         for b in args.batch_sizes)
+        else:
+            specs.extend({"stage": stage, "case": c, "image": images[case_name(c)], "batch_size": 1}
+                         for c in cases)
+
+    passthrough = ["--repeat", str(args.repeat), "--warmup", str(args.warmup)]
+    if args.backend:
+        passthrough += ["--backend", args.backend]
+    if model_path:
+        passthrough += ["--model-path", model_path]
+
+    results = []
+    print(f"{'stage':<12s}{'case':<36s}{'p50 ms':>9s}{'p95 ms':>9s}{'items/s':>10s}{'peak MB':>9s}{'Δ MB':>8s}")
+    for spec in specs:
+        proc = subprocess.run([sys.executable, __file__, "--worker", json.dumps(spec), *passthrough],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{spec['stage']:<12s} failed:\n{proc.stderr}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        results.append(r)
+        print(f"{r['stage']:<12s}{r['case']:<36s}{r['p50_ms']:9.1f}{r['p95_ms']:9.1f}"
+              f"{r['throughput_per_s']:10.1f}{r['peak_rss_mb']:9.0f}{r['rss_delta_mb']:8.0f}")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
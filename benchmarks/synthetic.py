@@ -0,0 +1,178 @@
+# benchmarks/synthetic.py
+
+import sys
+import os
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import argparse
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+
+GRID_COLOR  = (255, 190, 190)  # RGB, the pink of standard ECG paper
+TRACE_COLOR = (25, 25, 25)
+
+# ── Waveform ─────────────────────────────────────────────────────────────
+def heartbeat(t, heart_rate=72.0, rng=None):
+    """Sum-of-Gaussians P-QRS-T complex repeated at ``heart_rate`` bpm.
+
+    ``t`` is time in seconds; returns amplitude in mV-like units (R peak ~1).
+    """
+    period = 60.0 / heart_rate
+    phase = np.mod(t, period) / period
+    waves = [  # (center as fraction of the beat, width, amplitude)
+        (0.16, 0.025, 0.12),   # P
+        (0.27, 0.008, -0.10),  # Q
+        (0.30, 0.010, 1.00),   # R
+        (0.33, 0.010, -0.25),  # S
+        (0.55, 0.045, 0.30),   # T
+    ]
+    if rng is not None:
+        waves = [(c, w, a * rng.uniform(0.7, 1.3)) for c, w, a in waves]
+    return sum(a * np.exp(-0.5 * ((phase - c) / w) ** 2) for c, w, a in waves)
+
+# ── Image generator ──────────────────────────────────────────────────────
+def layout(width=2200, height=1700, rhythm_strip=True):
+    """Page geometry of ``synthetic_ecg``: the plot's (x0, x1) extent and the
+    (y0, y1) cell of every row (the rhythm strip last), in pixels."""
+    margin_x, margin_y = width // 25, height // 20
+    rows = 4 if rhythm_strip else 3
+    row_h = (height - 2 * margin_y) / rows
+    cells = [(margin_y + row_h * r, margin_y + row_h * (r + 1)) for r in range(rows)]
+    return (margin_x, width - margin_x), cells
+
+def synthetic_ecg(width=2200, height=1700, grid=True, noise=0.0, rhythm_strip=True,
+                  heart_rate=72.0, seed=0):
+    """Render a 12-lead printout as an RGB uint8 array.
+
+    Three rows of four 2.5 s leads on ECG paper (1 mm minor / 5 mm major grid
+    lines), plus an optional full-width lead II rhythm strip below. ``noise``
+    is the standard deviation of additive Gaussian pixel noise (0-255 scale),
+    which stands in for sensor noise and paper texture in photos.
+    """
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    (margin_x, _), cells = layout(width, height, rhythm_strip)
+    margin_y = height // 20
+    rows = len(cells)
+    row_h = cells[0][1] - cells[0][0]
+    plot_w = width - 2 * margin_x
+
+    if grid:
+        # 10 s across the plot width at 25 mm/s gives the mm pitch in pixels
+        mm = plot_w / 250.0
+        for i, x in enumerate(np.arange(margin_x, width - margin_x + 1, mm)):
+            cv2.line(img, (int(x), margin_y), (int(x), height - margin_y), GRID_COLOR, 2 if i % 5 == 0 else 1)
+        for i, y in enumerate(np.arange(margin_y, height - margin_y + 1, mm)):
+            cv2.line(img, (margin_x, int(y)), (width - margin_x, int(y)), GRID_COLOR, 2 if i % 5 == 0 else 1)
+
+    thickness = max(1, width // 700)
+    x = np.arange(plot_w)
+    t = x / plot_w * 10.0
+    for r in range(rows):
+        baseline = margin_y + row_h * (r + 0.6)
+        amplitude = row_h * 0.35
+        y = baseline - amplitude * heartbeat(t, heart_rate, rng)
+        pts = np.stack([x + margin_x, y], axis=1).astype(np.int32)
+        if r < 3:
+            # Each row shows four leads side by side, drawn as separate segments
+            for c in range(4):
+                seg = pts[c * plot_w // 4:(c + 1) * plot_w // 4 - 2]
+                cv2.polylines(img, [seg], False, TRACE_COLOR, thickness, cv2.LINE_AA)
+        else:
+            cv2.polylines(img, [pts], False, TRACE_COLOR, thickness, cv2.LINE_AA)
+
+    if noise:
+        noisy = img.astype(np.float32) + rng.normal(0.0, noise, img.shape)
+        img = np.clip(noisy, 0, 255).astype(np.uint8)
+    return img
+
+IMAGE_MODES = ("RGB", "L", "P", "1", "I;16")
+
+def encode(rgb, fmt="png", quality=90, mode="RGB"):
+    """Encode an RGB array to PNG, JPEG or TIFF bytes, as an upload would arrive.
+
+    ``mode`` stores the image as greyscale (``L``), palette (``P``), 1-bit
+    (``1``) or 16-bit greyscale (``I;16``) instead of RGB, as scanners and
+    image editors often do; JPEG only supports RGB and L.
+    """
+    if mode == "I;16":
+        gray = np.asarray(Image.fromarray(rgb).convert("L"), dtype=np.uint16) * 257
+        img = Image.fromarray(gray)
+    elif mode in IMAGE_MODES:
+        img = Image.fromarray(rgb).convert(mode)
+    else:
+        raise ValueError(f"Unknown image mode '{mode}', expected one of {IMAGE_MODES}")
+
+    buf = io.BytesIO()
+    if fmt.lower() in ("jpg", "jpeg"):
+        if mode not in ("RGB", "L"):
+            raise ValueError(f"JPEG cannot store mode '{mode}' images")
+        img.save(buf, format="JPEG", quality=quality)
+    elif fmt.lower() in ("png", "tiff"):
+        img.save(buf, format=fmt.upper())
+    else:
+        raise ValueError(f"Unknown image format '{fmt}'")
+    return buf.getvalue()
+
+# ── Localization check ───────────────────────────────────────────────────
+def check_layout(rgb, width, height, rhythm_strip=True, tolerance=0.005):
+    """Compare ``ECGPreprocessor``'s lead extent and rows with the known layout.
+
+    The horizontal extent may be off by at most ``tolerance`` of the width at
+    each end (the 3x4 split divides it evenly, so any error shifts the leads),
+    and every detected row must be centred in its cell. Returns (ok, message).
+    """
+    from src.utils.preprocess import ECGPreprocessor
+    pre = ECGPreprocessor()
+    _, bands, (x0, x1), rhythm, _ = pre(rgb)
+    scale = width / pre.work_width
+    (true_x0, true_x1), cells = layout(width, height, rhythm_strip)
+    x_err = max(abs(x0 * scale - true_x0), abs(x1 * scale - true_x1))
+
+    found = bands + ([rhythm] if rhythm else [])
+    rows_ok = len(found) == len(cells) and all(
+        c0 <= (a + b) / 2 * scale <= c1 for (a, b), (c0, c1) in zip(found, cells))
+    ok = x_err <= tolerance * width and rows_ok
+    return ok, (f"extent ({x0 * scale:.0f}, {x1 * scale:.0f}) vs ({true_x0}, {true_x1}), "
+                f"error {x_err:.0f} px; {len(found)}/{len(cells)} rows {'in place' if rows_ok else 'MISPLACED'}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic 12-lead ECG images")
+    parser.add_argument("--output",  type=str,   default="synthetic_ecgs")
+    parser.add_argument("--count",   type=int,   default=10)
+    parser.add_argument("--width",   type=int,   default=2200)
+    parser.add_argument("--height",  type=int,   default=1700)
+    parser.add_argument("--format",  type=str,   default="png", choices=["png", "jpeg", "tiff"])
+    parser.add_argument("--mode",    type=str,   default="RGB", choices=IMAGE_MODES,
+                        help="Stored image mode (palette, 1-bit and 16-bit files exercise decoding)")
+    parser.add_argument("--quality", type=int,   default=90, help="JPEG quality")
+    parser.add_argument("--noise",   type=float, default=0.0, help="Pixel noise std (0-255)")
+    parser.add_argument("--no-grid", action="store_true")
+    parser.add_argument("--seed",    type=int,   default=0)
+    parser.add_argument("--check",   action="store_true",
+                        help="Also check lead localization against the known layout; exits non-zero on a mismatch")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    ext = {"jpeg": "jpg", "png": "png", "tiff": "tif"}[args.format]
+    failures = 0
+    for i in range(args.count):
+        rgb = synthetic_ecg(args.width, args.height, grid=not args.no_grid, noise=args.noise,
+                            heart_rate=60 + (i * 7) % 50, seed=args.seed + i)
+        path = os.path.join(args.output, f"synthetic_{i:04d}.{ext}")
+        with open(path, "wb") as f:
+            f.write(encode(rgb, args.format, args.quality, args.mode))
+        if args.check:
+            ok, message = check_layout(rgb, args.width, args.height)
+            failures += not ok
+            print(f"  {path}: {message}  {'OK' if ok else 'MISMATCH'}")
+    print(f"Wrote {args.count} images to {args.output}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
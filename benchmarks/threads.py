@@ -0,0 +1,114 @@
+# benchmarks/threads.py
+
+import sys
+import os
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import argparse
+import itertools
+import json
+import subprocess
+import threading
+import time
+
+def run_worker(intra, interop, concurrency, sessions, requests_per_session, batch_size):
+    """Simulate ``sessions`` app sessions sharing one process-wide inference limiter."""
+    import numpy as np
+    import torch
+
+    from src.data_transforms import IMG_SIZE
+    from src.model import build_model
+    from src.runtime import InferenceLimiter, configure_threads
+
+    configure_threads({"intraop_threads": intra, "interop_threads": interop,
+                       "opencv_threads": None, "max_concurrent_inference": concurrency})
+    model = build_model().eval()
+    limiter = InferenceLimiter(concurrency)
+    batch = torch.randn(batch_size, 3, IMG_SIZE, IMG_SIZE)
+
+    def forward():
+        with torch.inference_mode():
+            return model(batch)
+
+    for _ in range(3):
+        forward()
+
+    latencies = []
+    lock = threading.Lock()
+
+    def session():
+        for _ in range(requests_per_session):
+            start = time.perf_counter()
+            limiter.run(forward)
+            elapsed = (time.perf_counter() - start) * 1000.0
+            with lock:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    lat = np.array(latencies)
+    return {
+        "intraop_threads": intra, "interop_threads": interop,
+        "max_concurrent_inference": concurrency, "sessions": sessions,
+        "images_per_sec": len(lat) * batch_size / wall,
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p95_ms": float(np.percentile(lat, 95)),
+        "p99_ms": float(np.percentile(lat, 99)),
+    }
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Inference throughput and tail latency vs. thread settings")
+    parser.add_argument("--intra",       type=int, nargs="+",
+                        default=sorted({1, 2, max(1, cores // 2), cores}))
+    parser.add_argument("--interop",     type=int, nargs="+", default=[1])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--sessions",    type=int, default=8,
+                        help="Simulated concurrent app sessions")
+    parser.add_argument("--requests",    type=int, default=10,
+                        help="Requests per session")
+    parser.add_argument("--batch-size",  type=int, default=1)
+    parser.add_argument("--output",      type=str, default=None, help="Optional JSON result file")
+    parser.add_argument("--worker",      action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # Inter-op threads can only be set once per process, so every
+        # configuration runs in its own interpreter
+        print(json.dumps(run_worker(args.intra[0], args.interop[0], args.concurrency[0],
+                                    args.sessions, args.requests, args.batch_size)))
+        return
+
+    results = []
+    print(f"{'intra':>6s}{'inter':>6s}{'conc':>6s}{'img/s':>10s}{'p50 ms':>10s}{'p95 ms':>10s}{'p99 ms':>10s}")
+    for intra, interop, conc in itertools.product(args.intra, args.interop, args.concurrency):
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker",
+             "--intra", str(intra), "--interop", str(interop), "--concurrency", str(conc),
+             "--sessions", str(args.sessions), "--requests", str(args.requests),
+             "--batch-size", str(args.batch_size)],
+            capture_output=True, text=True, check=True,
+        )
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        results.append(r)
+        print(f"{intra:6d}{interop:6d}{conc:6d}{r['images_per_sec']:10.1f}"
+              f"{r['p50_ms']:10.1f}{r['p95_ms']:10.1f}{r['p99_ms']:10.1f}")
+
+    best = max(results, key=lambda r: r["images_per_sec"])
+    print(f"\nBest throughput: intra={best['intraop_threads']} inter={best['interop_threads']} "
+          f"concurrency={best['max_concurrent_inference']} ({best['images_per_sec']:.1f} img/s)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
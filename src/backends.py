@@ -0,0 +1,126 @@
+# src/backends.py
+
+import json
+import os
+from functools import cached_property
+
+import numpy as np
+import torch
+
+from src.model import CLASS_NAMES, DEFAULT_CHECKPOINT, load_model
+from src.utils.result_cache import file_hash
+
+# ── Default artifact locations (written by src/export.py) ────────────────
+DEFAULT_PATHS = {
+    "eager":       DEFAULT_CHECKPOINT,
+    "torchscript": "models/best_model.torchscript.pt",
+    "onnx":        "models/best_model.onnx",
+    "int8":        "models/best_model.int8.pt",
+}
+
+# ── Metadata stored inside exported artifacts ────────────────────────────
+# TorchScript keeps it as an extra file in the archive, ONNX as a model property
+METADATA_KEY = "metadata.json"
+
+def torchscript_extra_files(metadata):
+    """``_extra_files`` for ``torch.jit.save`` carrying the checkpoint metadata."""
+    return {METADATA_KEY: json.dumps(metadata)}
+
+def artifact_metadata(raw, path):
+    """Parse metadata read back from an exported artifact.
+
+    Artifacts exported before the metadata was stored carry none; like legacy
+    checkpoints they are assumed to use the original training classes.
+    """
+    if raw:
+        return json.loads(raw)
+    print(f"Warning: {path} has no stored metadata, assuming classes {CLASS_NAMES}")
+    return {"format": 0, "class_names": list(CLASS_NAMES)}
+
+class EagerBackend:
+    """Plain PyTorch eager-mode ResNet-18 rebuilt from the training checkpoint."""
+
+    name = "eager"
+
+    def __init__(self, path=DEFAULT_PATHS["eager"], device="cpu"):
+        self.path = path
+        self.device = torch.device(device)
+        self.model = load_model(path, self.device)
+        self.metadata = self.model.metadata
+
+    @property
+    def class_names(self):
+        return self.metadata["class_names"]
+
+    @cached_property
+    def fingerprint(self):
+        return f"{self.name}:{file_hash(self.path)}"
+
+    def predict(self, batch):
+        """Class probabilities for a (N, 3, H, W) float tensor, as a NumPy array."""
+        with torch.inference_mode():
+            logits = self.model(batch.to(self.device))
+            return torch.softmax(logits, dim=1).cpu().numpy()
+
+class TorchScriptBackend(EagerBackend):
+    """Frozen TorchScript graph exported from the eager model."""
+
+    name = "torchscript"
+
+    def __init__(self, path=DEFAULT_PATHS["torchscript"], device="cpu"):
+        self.path = path
+        self.device = torch.device(device)
+        extra_files = {METADATA_KEY: ""}
+        self.model = torch.jit.load(path, map_location=self.device, _extra_files=extra_files)
+        self.model.eval()
+        self.metadata = artifact_metadata(extra_files[METADATA_KEY], path)
+
+class Int8Backend(TorchScriptBackend):
+    """Static INT8 model produced by src/quantize.py, saved as TorchScript."""
+
+    name = "int8"
+
+    def __init__(self, path=DEFAULT_PATHS["int8"], device="cpu"):
+        # Quantized kernels only exist on CPU
+        if "x86" in torch.backends.quantized.supported_engines:
+            torch.backends.quantized.engine = "x86"
+        super().__init__(path, "cpu")
+
+class OnnxBackend(EagerBackend):
+    """ONNX Runtime on the CPU execution provider with full graph optimization."""
+
+    name = "onnx"
+
+    def __init__(self, path=DEFAULT_PATHS["onnx"], device="cpu"):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "The ONNX backend needs onnxruntime: pip install onnxruntime"
+            ) from e
+
+        self.path = path
+        self.device = torch.device("cpu")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.metadata = artifact_metadata(self.session.get_modelmeta().custom_metadata_map.get(METADATA_KEY), path)
+
+    def predict(self, batch):
+        inputs = batch.detach().cpu().numpy().astype(np.float32, copy=False)
+        logits = self.session.run(None, {self.input_name: inputs})[0]
+        # Numerically stable softmax over the class axis
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+BACKENDS = {b.name: b for b in (EagerBackend, TorchScriptBackend, Int8Backend, OnnxBackend)}
+
+def load_backend(name=None, path=None, device="cpu"):
+    """Build an inference backend; defaults come from CARDIOSCAN_BACKEND / CARDIOSCAN_MODEL_PATH."""
+    name = name or os.environ.get("CARDIOSCAN_BACKEND", "eager")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}', choose from {sorted(BACKENDS)}")
+    path = path or os.environ.get("CARDIOSCAN_MODEL_PATH") or DEFAULT_PATHS[name]
+    return BACKENDS[name](path, device)
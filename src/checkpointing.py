@@ -0,0 +1,136 @@
+# src/checkpointing.py
+
+import copy
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+
+TRAIN_STATE_FORMAT = 1
+
+# ── RNG state ────────────────────────────────────────────────────────────
+def rng_state():
+    """States of every RNG training draws from (shuffling, augmentation, dropout)."""
+    return {
+        "python": random.getstate(),
+        "numpy":  np.random.get_state(),
+        "torch":  torch.get_rng_state(),
+        "cuda":   torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None,
+    }
+
+def set_rng_state(state):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if state["cuda"] is not None and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+# ── Snapshots ────────────────────────────────────────────────────────────
+class StateBuffer:
+    """Preallocated CPU copy of a nested state (dicts, lists, tensors).
+
+    ``copy`` refreshes the buffers in place, so snapshotting the same model
+    or optimizer again allocates nothing; only small non-tensor values are
+    copied anew.
+    """
+
+    def __init__(self):
+        self._tensors = {}
+
+    def copy(self, state, key=()):
+        if isinstance(state, torch.Tensor):
+            buf = self._tensors.get(key)
+            if buf is None or buf.shape != state.shape or buf.dtype != state.dtype:
+                buf = torch.empty(state.shape, dtype=state.dtype,
+                                  pin_memory=state.is_cuda and torch.cuda.is_available())
+                self._tensors[key] = buf
+            return buf.copy_(state)
+        if isinstance(state, dict):
+            return {k: self.copy(v, key + (k,)) for k, v in state.items()}
+        if isinstance(state, (list, tuple)):
+            return type(state)(self.copy(v, key + (i,)) for i, v in enumerate(state))
+        return copy.deepcopy(state)
+
+def atomic_save(obj, path):
+    """``torch.save`` to a temporary file, then rename it over ``path``, so a
+    crash mid-write leaves the previous checkpoint intact."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        torch.save(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class AsyncCheckpointer:
+    """Writes checkpoints on a background thread.
+
+    ``save`` snapshots the state into a ``StateBuffer`` kept per target path
+    (the only work done on the training thread) and returns that snapshot;
+    serialization and disk I/O happen in the background. A save waits only
+    for the previous write to the same path, so a buffer is never
+    overwritten mid-write; write errors surface on the next ``save`` to that
+    path or on ``wait``.
+    """
+
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self._buffers = {}
+        self._pending = {}
+
+    def save(self, path, state):
+        self._wait(path)
+        snapshot = self._buffers.setdefault(path, StateBuffer()).copy(state)
+        self._pending[path] = self._pool.submit(atomic_save, snapshot, path)
+        return snapshot
+
+    def _wait(self, path):
+        pending = self._pending.pop(path, None)
+        if pending is not None:
+            pending.result()
+
+    def wait(self):
+        for path in list(self._pending):
+            self._wait(path)
+
+    def close(self):
+        self.wait()
+        self._pool.shutdown()
+
+def training_state(model, optimizer, epoch, best_acc, class_names, scheduler=None, rng=None):
+    """Everything needed to continue training after ``epoch``.
+
+    ``rng`` defaults to this process's RNG state; distributed runs pass the
+    list gathered from every rank.
+    """
+    return {
+        "format":      TRAIN_STATE_FORMAT,
+        "epoch":       epoch,
+        "best_acc":    best_acc,
+        "class_names": list(class_names),
+        "model":       model.state_dict(),
+        "optimizer":   optimizer.state_dict(),
+        "scheduler":   scheduler.state_dict() if scheduler is not None else None,
+        "rng":         rng if rng is not None else rng_state(),
+    }
+
+def load_training_state(path, model, optimizer, class_names, scheduler=None, rank=0):
+    """Restore a ``training_state`` checkpoint in place; returns (epoch, best_acc).
+
+    With per-rank RNG states, ``rank`` picks this process's (wrapping around
+    if the run is resumed with more processes than it was saved with).
+    """
+    state = torch.load(path, map_location="cpu", weights_only=False)
+    if list(state["class_names"]) != list(class_names):
+        raise ValueError(f"{path} was trained on classes {state['class_names']}, "
+                         f"the data has {list(class_names)}")
+    model.load_state_dict(state["model"])
+    optimizer.load_state_dict(state["optimizer"])
+    if scheduler is not None and state["scheduler"] is not None:
+        scheduler.load_state_dict(state["scheduler"])
+    rng = state["rng"]
+    set_rng_state(rng[rank % len(rng)] if isinstance(rng, list) else rng)
+    return state["epoch"], state["best_acc"]
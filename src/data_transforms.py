@@ -1,3 +1,6 @@
+import numpy as np
+import torch
+import torch.nn.functional as F
 from torchvision import transforms
 
 # ── Constants ─────────────────────────────────────────────────────────────
@@ -5,6 +8,12 @@ IMG_SIZE = 224
 MEAN     = [0.485, 0.456, 0.406]
 STD      = [0.229, 0.224, 0.225]
 
+# Augmentation parameters shared by the PIL and the batched training pipelines
+FLIP_P     = 0.5
+DEGREES    = 15
+BRIGHTNESS = 0.2
+CONTRAST   = 0.2
+
 # ── Base pipeline (resize + normalize) ───────────────────────────────────
 base_transforms = transforms.Compose([
     transforms.Resize((IMG_SIZE, IMG_SIZE)),
@@ -14,9 +23,9 @@ base_transforms = transforms.Compose([
 
 # ── Training pipeline (augment + base) ───────────────────────────────────
 train_transforms = transforms.Compose([
-    transforms.RandomHorizontalFlip(p=0.5),
-    transforms.RandomRotation(degrees=15),
-    transforms.ColorJitter(brightness=0.2, contrast=0.2),
+    transforms.RandomHorizontalFlip(p=FLIP_P),
+    transforms.RandomRotation(degrees=DEGREES),
+    transforms.ColorJitter(brightness=BRIGHTNESS, contrast=CONTRAST),
     transforms.Resize((IMG_SIZE, IMG_SIZE)),
     transforms.ToTensor(),
     transforms.Normalize(mean=MEAN, std=STD)
@@ -25,3 +34,71 @@ train_transforms = transforms.Compose([
 # ── Validation / Test pipelines ──────────────────────────────────────────
 val_transforms  = base_transforms
 test_transforms = base_transforms
+
+# ── Batched training pipeline (uint8 batch → augmented tensor) ──────────
+# Per sample, only resize to IMG_SIZE and keep uint8; BatchAugment does the rest
+uint8_transforms = transforms.Compose([
+    transforms.Resize((IMG_SIZE, IMG_SIZE)),
+    transforms.PILToTensor(),
+])
+
+class BatchAugment:
+    """``train_transforms`` for a whole (n, 3, h, w) uint8 batch at once.
+
+    Resizes to IMG_SIZE first, then applies the same random horizontal flip,
+    rotation (black fill) and brightness/contrast jitter with independent
+    parameters per sample, and normalizes. Runs on whatever device the batch
+    is on, so it can be applied after ``.to(device)`` in the training loop.
+    """
+
+    def __init__(self, flip_p=FLIP_P, degrees=DEGREES, brightness=BRIGHTNESS, contrast=CONTRAST,
+                 size=IMG_SIZE):
+        self.flip_p = flip_p
+        self.degrees = degrees
+        self.brightness = brightness
+        self.contrast = contrast
+        self.size = size
+
+    def __call__(self, batch):
+        n = batch.shape[0]
+        x = batch.float().div_(255.0)
+        if x.shape[-2:] != (self.size, self.size):
+            x = F.interpolate(x, size=(self.size, self.size), mode="bilinear", antialias=True,
+                              align_corners=False)
+
+        # Flip and rotation as one affine resampling per sample
+        flip = torch.where(torch.rand(n, device=x.device) < self.flip_p, -1.0, 1.0)
+        angle = torch.deg2rad(torch.empty(n, device=x.device).uniform_(-self.degrees, self.degrees))
+        cos, sin = torch.cos(angle), torch.sin(angle)
+        zero = torch.zeros_like(cos)
+        theta = torch.stack([
+            torch.stack([cos * flip, -sin, zero], dim=1),
+            torch.stack([sin * flip, cos, zero], dim=1),
+        ], dim=1)
+        grid = F.affine_grid(theta, list(x.shape), align_corners=False)
+        x = F.grid_sample(x, grid, mode="bilinear", padding_mode="zeros", align_corners=False)
+
+        # ColorJitter: brightness scales the image, contrast blends it with its mean grey level
+        b = torch.empty(n, 1, 1, 1, device=x.device).uniform_(1 - self.brightness, 1 + self.brightness)
+        x = (x * b).clamp_(0.0, 1.0)
+        c = torch.empty(n, 1, 1, 1, device=x.device).uniform_(1 - self.contrast, 1 + self.contrast)
+        weights = torch.tensor([0.2989, 0.587, 0.114], device=x.device).view(1, 3, 1, 1)
+        grey_mean = (x * weights).sum(dim=1, keepdim=True).mean(dim=(2, 3), keepdim=True)
+        x = (c * x + (1 - c) * grey_mean).clamp_(0.0, 1.0)
+
+        mean = torch.tensor(MEAN, device=x.device).view(1, 3, 1, 1)
+        std = torch.tensor(STD, device=x.device).view(1, 3, 1, 1)
+        return (x - mean) / std
+
+# ── Per-lead batch (grayscale lead crops → one tensor) ───────────────────
+def lead_batch(leads):
+    """Stack (n, h, w) uint8 grayscale lead crops into a (n, 3, IMG_SIZE, IMG_SIZE) batch.
+
+    Matches ``val_transforms`` applied to each crop converted to RGB, but
+    resizes and normalizes all crops in one tensor operation.
+    """
+    x = torch.from_numpy(np.ascontiguousarray(leads)).unsqueeze(1).float().div_(255.0)
+    x = F.interpolate(x, size=(IMG_SIZE, IMG_SIZE), mode="bilinear", antialias=True, align_corners=False)
+    mean = torch.tensor(MEAN).view(1, 3, 1, 1)
+    std = torch.tensor(STD).view(1, 3, 1, 1)
+    return (x.expand(-1, 3, -1, -1) - mean) / std
@@ -0,0 +1,191 @@
+# src/dataset_cache.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import hashlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import torch
+from PIL import Image
+from torch.utils.data import Dataset
+from torchvision.datasets.folder import IMG_EXTENSIONS, find_classes, make_dataset
+
+from src.utils.decoding import open_reduced
+
+CACHE_FORMAT = 1
+CACHE_SIZE   = 256   # stored resolution; the transforms resize from here to IMG_SIZE
+SPLITS       = ("train", "val", "test")
+
+# ── Source scan ──────────────────────────────────────────────────────────
+def scan_split(split_dir):
+    """Classes and (path, label) samples of an ImageFolder-style directory,
+    enumerated exactly as ``ImageFolder`` would."""
+    classes, class_to_idx = find_classes(split_dir)
+    samples = make_dataset(split_dir, class_to_idx, extensions=IMG_EXTENSIONS)
+    return classes, samples
+
+def fingerprint(split_dir, samples, size):
+    """Hash of every source file's relative path, size and mtime plus the
+    cache settings; any added, removed, renamed or rewritten image changes it."""
+    h = hashlib.sha1(f"{CACHE_FORMAT}:{size}".encode())
+    for path, label in samples:
+        st = os.stat(path)
+        h.update(f"{os.path.relpath(path, split_dir)}\0{label}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+# ── Building ─────────────────────────────────────────────────────────────
+def load_image(path, size=CACHE_SIZE):
+    """Decode one image, whatever its mode, to a (size, size, 3) uint8 array."""
+    with open(path, "rb") as f:
+        image, _ = open_reduced(f.read(), min_size=(size, size))
+    return np.asarray(image.resize((size, size), Image.BILINEAR))
+
+def _load_chunk(paths, size):
+    """(arrays, errors) for a list of paths; a file that fails leaves a blank
+    array and an error message instead of aborting the chunk."""
+    arrays, errors = [], []
+    for path in paths:
+        try:
+            arrays.append(load_image(path, size))
+        except Exception as e:
+            arrays.append(np.zeros((size, size, 3), dtype=np.uint8))
+            errors.append(f"{path}: {type(e).__name__}: {e}")
+    return arrays, errors
+
+def build_split(split_dir, cache_dir, size=CACHE_SIZE, workers=None, chunk_size=32, force=False):
+    """Write ``split_dir`` to ``cache_dir`` unless an up-to-date cache is there.
+
+    The cache holds ``images.npy`` (N, size, size, 3) uint8, ``labels.npy``
+    and ``meta.json`` with the class list and the source fingerprint.
+    ``meta.json`` is written last, so an interrupted build is never mistaken
+    for a complete one. Returns the cache directory.
+    """
+    classes, samples = scan_split(split_dir)
+    if not samples:
+        raise FileNotFoundError(f"No images found under {split_dir}")
+    digest = fingerprint(split_dir, samples, size)
+    meta_path = os.path.join(cache_dir, "meta.json")
+    if not force and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f).get("fingerprint") == digest:
+                return cache_dir
+
+    os.makedirs(cache_dir, exist_ok=True)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    start = time.perf_counter()
+    paths = [p for p, _ in samples]
+    tmp_path = os.path.join(cache_dir, "images.tmp.npy")
+    images = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8,
+                                       shape=(len(paths), size, size, 3))
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    errors = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        # map() returns chunks in order, so each lands at its own offset
+        for i, (arrays, chunk_errors) in enumerate(pool.map(_load_chunk, chunks, [size] * len(chunks))):
+            images[i * chunk_size:i * chunk_size + len(arrays)] = np.stack(arrays)
+            errors.extend(chunk_errors)
+    images.flush()
+    del images
+    if errors:
+        # Report every unreadable file at once, as ImageFolder would fail on them mid-training
+        os.remove(tmp_path)
+        listed = "\n  ".join(errors[:20]) + (f"\n  ... and {len(errors) - 20} more" if len(errors) > 20 else "")
+        raise RuntimeError(f"Cannot decode {len(errors)} of {len(paths)} images under {split_dir}:\n  {listed}")
+    os.replace(tmp_path, os.path.join(cache_dir, "images.npy"))
+    np.save(os.path.join(cache_dir, "labels.npy"), np.array([l for _, l in samples], dtype=np.int64))
+
+    meta = {
+        "format": CACHE_FORMAT,
+        "size": size,
+        "count": len(samples),
+        "classes": classes,
+        "source": os.path.abspath(split_dir),
+        "fingerprint": digest,
+    }
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_path + ".tmp", meta_path)
+    print(f"Cached {len(samples)} images from {split_dir} in {time.perf_counter() - start:.1f}s → {cache_dir}")
+    return cache_dir
+
+# ── Reading ──────────────────────────────────────────────────────────────
+class CachedImageDataset(Dataset):
+    """An ``ImageFolder`` replacement backed by a ``build_split`` cache.
+
+    ``images`` is a memory map of the cache file, so indexing or slicing it
+    reads pages straight from the OS page cache without copying the rest of
+    the array. With a ``transform`` each item is handed over as a PIL image,
+    like ``ImageFolder``; without one it is a (3, size, size) uint8 tensor
+    viewing the map. The map is opened lazily in each process, so DataLoader
+    workers never pickle the array itself.
+    """
+
+    def __init__(self, cache_dir, transform=None):
+        self.cache_dir = cache_dir
+        self.transform = transform
+        with open(os.path.join(cache_dir, "meta.json")) as f:
+            meta = json.load(f)
+        self.classes = meta["classes"]
+        self.class_to_idx = {c: i for i, c in enumerate(self.classes)}
+        self.size = meta["size"]
+        self.labels = np.load(os.path.join(cache_dir, "labels.npy"))
+        self.targets = self.labels.tolist()
+        self._images = None
+
+    @property
+    def images(self):
+        if self._images is None:
+            # Copy-on-write: writable for torch.from_numpy, the file is never modified
+            self._images = np.load(os.path.join(self.cache_dir, "images.npy"), mmap_mode="c")
+        return self._images
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, idx):
+        image = self.images[idx]
+        if self.transform is None:
+            return torch.from_numpy(image).permute(2, 0, 1), int(self.labels[idx])
+        return self.transform(Image.fromarray(image)), int(self.labels[idx])
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_images"] = None
+        return state
+
+def cached_split(data_dir, cache_dir, split, transform=None, size=CACHE_SIZE, workers=None):
+    """Build (if stale) and open the cache of one split of ``data_dir``."""
+    path = build_split(os.path.join(data_dir, split), os.path.join(cache_dir, split), size, workers)
+    return CachedImageDataset(path, transform)
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-decode train/val/test images into memory-mapped caches")
+    parser.add_argument("--data-dir",   type=str, default="data",
+                        help="Root folder with train/val/test subfolders")
+    parser.add_argument("--cache-dir",  type=str, default="data_cache")
+    parser.add_argument("--size",       type=int, default=CACHE_SIZE,
+                        help="Stored width and height in pixels")
+    parser.add_argument("--splits",     type=str, nargs="+", default=list(SPLITS))
+    parser.add_argument("--workers",    type=int, default=None, help="Decoding processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=32)
+    parser.add_argument("--force",      action="store_true", help="Rebuild even if the cache is up to date")
+    args = parser.parse_args()
+
+    for split in args.splits:
+        cache_dir = os.path.join(args.cache_dir, split)
+        build_split(os.path.join(args.data_dir, split), cache_dir, args.size,
+                    args.workers, args.chunk_size, args.force)
+        with open(os.path.join(cache_dir, "meta.json")) as f:
+            meta = json.load(f)
+        mb = os.path.getsize(os.path.join(cache_dir, "images.npy")) / 1e6
+        print(f"{split:<6s}{meta['count']:8d} images  {len(meta['classes'])} classes  {mb:9.1f} MB  {cache_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# src/distributed.py
+
+import os
+
+import torch
+import torch.distributed as dist
+from torch.utils.data import Sampler
+
+def init_distributed(backend="gloo"):
+    """Join the process group when launched by ``torchrun``.
+
+    Returns (rank, world size, local rank); (0, 1, 0) for a plain
+    ``python`` launch, which leaves everything single-process.
+    """
+    if int(os.environ.get("WORLD_SIZE", "1")) <= 1:
+        return 0, 1, 0
+    dist.init_process_group(backend)
+    return dist.get_rank(), dist.get_world_size(), int(os.environ.get("LOCAL_RANK", "0"))
+
+def is_distributed():
+    return dist.is_available() and dist.is_initialized()
+
+def is_main_process():
+    return not is_distributed() or dist.get_rank() == 0
+
+def barrier():
+    if is_distributed():
+        dist.barrier()
+
+def all_reduce_sum(*values):
+    """Sum Python numbers over all ranks (a no-op in a single process)."""
+    if not is_distributed():
+        return values
+    t = torch.tensor(values, dtype=torch.float64)
+    dist.all_reduce(t)
+    return tuple(t.tolist())
+
+def broadcast_buffers(module, src=0):
+    """Copy ``src``'s buffers (BatchNorm running statistics) to every rank.
+
+    DDP syncs buffers only at the start of each training forward, so after
+    the last step of an epoch every rank holds statistics from its own batch.
+    """
+    if is_distributed():
+        for buf in module.buffers():
+            dist.broadcast(buf, src)
+
+def all_gather_object(obj):
+    """``obj`` from every rank, in rank order."""
+    if not is_distributed():
+        return [obj]
+    gathered = [None] * dist.get_world_size()
+    dist.all_gather_object(gathered, obj)
+    return gathered
+
+def cleanup():
+    if is_distributed():
+        dist.destroy_process_group()
+
+class ShardSampler(Sampler):
+    """Every ``num_replicas``-th index starting at ``rank``, in order.
+
+    For evaluation: unlike ``DistributedSampler`` it never pads the last
+    shard with repeated samples, so summed metrics count each sample once.
+    """
+
+    def __init__(self, dataset, num_replicas=None, rank=None):
+        self.num_replicas = num_replicas if num_replicas is not None else dist.get_world_size()
+        self.rank = rank if rank is not None else dist.get_rank()
+        self.length = len(dataset)
+
+    def __iter__(self):
+        return iter(range(self.rank, self.length, self.num_replicas))
+
+    def __len__(self):
+        return len(range(self.rank, self.length, self.num_replicas))
@@ -0,0 +1,104 @@
+# src/export.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import json
+
+import numpy as np
+import torch
+
+from src.backends import BACKENDS, DEFAULT_PATHS, METADATA_KEY, EagerBackend, torchscript_extra_files
+from src.data_transforms import IMG_SIZE
+from src.predict import ECGImageDataset
+from src.utils.paths import collect_image_paths
+
+def export_torchscript(model, path, metadata):
+    example = torch.randn(1, 3, IMG_SIZE, IMG_SIZE)
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example)
+    # Freezing inlines weights and folds conv/bn so the graph is inference-ready
+    frozen = torch.jit.freeze(traced)
+    frozen.save(path, _extra_files=torchscript_extra_files(metadata))
+    print(f"TorchScript model written to {path}")
+
+def export_onnx(model, path, metadata, opset=17):
+    example = torch.randn(1, 3, IMG_SIZE, IMG_SIZE)
+    torch.onnx.export(
+        model, example, path,
+        input_names=["image"], output_names=["logits"],
+        dynamic_axes={"image": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=opset,
+        dynamo=False,
+    )
+    import onnx
+    onnx_model = onnx.load(path)
+    onnx.helper.set_model_props(onnx_model, {METADATA_KEY: json.dumps(metadata)})
+    onnx.save(onnx_model, path)
+    print(f"ONNX model written to {path}")
+
+def load_probe_batch(probe_dir=None, n=16, seed=0):
+    """Transformed probe images from ``probe_dir``, or seeded random inputs."""
+    if probe_dir:
+        paths = collect_image_paths([probe_dir])[:n]
+        if paths:
+            dataset = ECGImageDataset(paths)
+            return torch.stack([dataset[i][0] for i in range(len(dataset))])
+    generator = torch.Generator().manual_seed(seed)
+    return torch.randn(n, 3, IMG_SIZE, IMG_SIZE, generator=generator)
+
+def check_backend(backend, reference, probe, atol):
+    """Compare a backend's probabilities with the eager reference on the probe set."""
+    probs = backend.predict(probe)
+    max_diff = float(np.abs(probs - reference).max())
+    agree = float((probs.argmax(1) == reference.argmax(1)).mean())
+    ok = max_diff <= atol
+    print(f"  {backend.name:12s} max |Δp| = {max_diff:.2e}  top-1 agreement = {agree:.2%}  "
+          f"{'OK' if ok else 'MISMATCH'}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the ECG classifier to TorchScript and ONNX")
+    parser.add_argument("--checkpoint",  type=str,   default=DEFAULT_PATHS["eager"])
+    parser.add_argument("--torchscript", type=str,   default=DEFAULT_PATHS["torchscript"])
+    parser.add_argument("--onnx",        type=str,   default=DEFAULT_PATHS["onnx"])
+    parser.add_argument("--formats",     type=str,   nargs="+", default=["torchscript", "onnx"],
+                        choices=["torchscript", "onnx"])
+    parser.add_argument("--opset",       type=int,   default=17)
+    parser.add_argument("--probe-dir",   type=str,   default=None,
+                        help="Folder of ECG images used to check exported outputs")
+    parser.add_argument("--probe-size",  type=int,   default=16)
+    parser.add_argument("--atol",        type=float, default=1e-4,
+                        help="Largest allowed probability difference against eager")
+    args = parser.parse_args()
+
+    eager = EagerBackend(args.checkpoint)
+    targets = {"torchscript": args.torchscript, "onnx": args.onnx}
+
+    for fmt in args.formats:
+        os.makedirs(os.path.dirname(targets[fmt]) or ".", exist_ok=True)
+        if fmt == "torchscript":
+            export_torchscript(eager.model, targets[fmt], eager.metadata)
+        else:
+            export_onnx(eager.model, targets[fmt], eager.metadata, args.opset)
+
+    # Check every exported artifact against the eager model on the same probe set
+    probe = load_probe_batch(args.probe_dir, args.probe_size)
+    reference = eager.predict(probe)
+    print(f"Checking {len(probe)} probe inputs against eager outputs:")
+    all_ok = True
+    for fmt in args.formats:
+        try:
+            backend = BACKENDS[fmt](targets[fmt])
+        except ImportError as e:
+            print(f"  {fmt:12s} skipped ({e})")
+            continue
+        all_ok &= check_backend(backend, reference, probe, args.atol)
+
+    if not all_ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
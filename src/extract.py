@@ -0,0 +1,173 @@
+# src/extract.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import csv
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from src.utils.image_processing import LEAD_NAMES, process_ecg_image
+from src.utils.paths import collect_image_paths
+from src.utils.signal_io import ENCODINGS, IPC_EXTENSIONS, PARQUET_EXTENSIONS, SignalWriter
+from src.utils.trace import LEAD_DURATION_S
+
+# ── Worker side ──────────────────────────────────────────────────────────
+def _init_worker():
+    # One process per core already saturates the machine; OpenCV's own
+    # thread pool on top of that only adds contention
+    import cv2
+    cv2.setNumThreads(1)
+
+def extract_chunk(paths, sample_rate=None, trace_method="centroid"):
+    """Decode, segment and trace a list of images in this process.
+
+    Returns one (signals, coverage, error) tuple per path; a file that fails
+    yields (None, None, message) instead of raising.
+    """
+    results = []
+    for path in paths:
+        try:
+            ecg = process_ecg_image(path, sample_rate=sample_rate, trace_method=trace_method)
+            results.append((ecg.signals.astype(np.float32), ecg.coverage.astype(np.float32), ""))
+        except Exception as e:
+            results.append((None, None, f"{type(e).__name__}: {e}"))
+    return results
+
+# ── Scheduling ───────────────────────────────────────────────────────────
+def extract_paths(paths, workers=None, chunk_size=16, max_in_flight=None,
+                  sample_rate=None, trace_method="centroid"):
+    """Yield (start index, chunk results) as chunks finish, in completion order.
+
+    Paths are split into chunks of ``chunk_size`` files, one task per chunk,
+    so scheduling overhead stays small against the per-image work. At most
+    ``max_in_flight`` chunks (default: twice the worker count) are submitted
+    at once, which bounds the memory held in pending results regardless of
+    archive size.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    chunks = ((i, paths[i:i + chunk_size]) for i in range(0, len(paths), chunk_size))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = {}
+        for start, chunk in chunks:
+            if len(pending) >= max_in_flight:
+                yield from _drain(pending, wait(pending, return_when=FIRST_COMPLETED).done)
+            future = pool.submit(extract_chunk, chunk, sample_rate, trace_method)
+            pending[future] = (start, chunk)
+        while pending:
+            yield from _drain(pending, wait(pending, return_when=FIRST_COMPLETED).done)
+
+def _drain(pending, done):
+    for future in done:
+        start, chunk = pending.pop(future)
+        try:
+            results = future.result()
+        except Exception as e:
+            # A worker that died (e.g. killed by the OOM killer) fails its chunk only
+            results = [(None, None, f"{type(e).__name__}: {e}")] * len(chunk)
+        yield start, results
+
+# ── Output ───────────────────────────────────────────────────────────────
+class SignalStore:
+    """Batch output: signals in an Arrow IPC/Parquet file plus a file index.
+
+    Successful files are streamed through ``SignalWriter`` as chunks arrive,
+    with the source path as the record id; the writer is opened on the
+    first result, once the sample count is known. ``<output>.index.csv``
+    lists every path with its status and error.
+    """
+
+    def __init__(self, path, paths, encoding="int16"):
+        self.path = path
+        self.paths = paths
+        self.encoding = encoding
+        self.errors = [None] * len(paths)
+        self.writer = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    @property
+    def index_path(self):
+        return os.path.splitext(self.path)[0] + ".index.csv"
+
+    def write(self, start, results):
+        ok = []
+        for i, (signals, coverage, error) in enumerate(results, start):
+            self.errors[i] = error
+            if signals is not None:
+                ok.append((self.paths[i], signals, coverage))
+        if not ok:
+            return
+        records, signals, coverage = zip(*ok)
+        if self.writer is None:
+            n_samples = signals[0].shape[-1]
+            self.writer = SignalWriter(self.path, LEAD_NAMES, n_samples,
+                                       n_samples / LEAD_DURATION_S, self.encoding)
+        self.writer.write(records, np.stack(signals), np.stack(coverage))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        with open(self.index_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["path", "status", "error"])
+            for path, error in zip(self.paths, self.errors):
+                writer.writerow([path, "failed" if error else "ok", error or ""])
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract 12-lead signals from ECG images in parallel")
+    parser.add_argument("inputs",          nargs="*",
+                        help="Image files, directories or glob patterns")
+    parser.add_argument("--file-list",     type=str,   default=None,
+                        help="Text file with one image path per line")
+    parser.add_argument("--output",        type=str,   default="signals.parquet",
+                        help="Output .parquet or .arrow file")
+    parser.add_argument("--encoding",      type=str,   default="int16", choices=ENCODINGS,
+                        help="Sample storage type (int16 is quantized with a per-lead scale)")
+    parser.add_argument("--workers",       type=int,   default=None,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size",    type=int,   default=16,
+                        help="Images per work unit")
+    parser.add_argument("--max-in-flight", type=int,   default=None,
+                        help="Chunks queued or running at once (default: 2x workers)")
+    parser.add_argument("--sample-rate",   type=float, default=None,
+                        help="Resample every lead to this rate in Hz")
+    parser.add_argument("--trace-method",  type=str,   default="centroid", choices=["centroid", "darkest"])
+    args = parser.parse_args()
+
+    paths = collect_image_paths(args.inputs, args.file_list)
+    if not paths:
+        parser.error("no input images found")
+    if not args.output.lower().endswith(IPC_EXTENSIONS + PARQUET_EXTENSIONS):
+        parser.error("--output must be a .parquet or .arrow file")
+
+    workers = args.workers or os.cpu_count() or 1
+    print(f"Extracting signals from {len(paths)} images with {workers} workers "
+          f"(chunks of {args.chunk_size})")
+
+    store = SignalStore(args.output, paths, args.encoding)
+    start = time.perf_counter()
+    done = 0
+    for first, results in extract_paths(paths, workers, args.chunk_size, args.max_in_flight,
+                                        args.sample_rate, args.trace_method):
+        store.write(first, results)
+        done += len(results)
+        print(f"\r  {done}/{len(paths)}", end="", flush=True)
+    store.close()
+    elapsed = time.perf_counter() - start
+
+    failed = [(p, e) for p, e in zip(paths, store.errors) if e]
+    print(f"\nExtracted {len(paths) - len(failed)} images, {len(failed)} failed "
+          f"in {elapsed:.1f}s ({len(paths) / elapsed:.1f} img/s) → {args.output}")
+    for path, error in failed[:10]:
+        print(f"  {path}: {error}")
+    if len(failed) > 10:
+        print(f"  ... see {store.index_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# src/inference.py
+
+import http.client
+import io
+import json
+from urllib.parse import urlsplit
+
+import numpy as np
+
+class LocalPredictor:
+    """Runs the classifier in-process on one of the backends in ``src/backends.py``."""
+
+    def __init__(self, backend, limiter=None):
+        self.backend = backend
+        self.limiter = limiter
+        self.fingerprint = backend.fingerprint
+        self.class_names = backend.class_names
+
+    def predict(self, tensor):
+        # tensor: a single transformed image of shape (3, H, W)
+        return self.predict_batch(tensor.unsqueeze(0))[0]
+
+    def predict_batch(self, batch):
+        # batch: (N, 3, H, W), scored in one forward pass
+        if self.limiter is None:
+            return self.backend.predict(batch)
+        return self.limiter.run(self.backend.predict, batch)
+
+class InferenceClient:
+    """Thin client for the micro-batching service in ``src/serve.py``."""
+
+    def __init__(self, url, timeout=30.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 8765
+        self.timeout = timeout
+        info = self._request("GET", "/info")
+        self.fingerprint = info["model_hash"]
+        self.class_names = info["class_names"]
+
+    def _request(self, method, path, body=None):
+        # One connection per call keeps the client safe to share across sessions
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            headers = {"Content-Type": "application/octet-stream"} if body is not None else {}
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            payload = json.loads(resp.read())
+            if resp.status != 200:
+                raise RuntimeError(f"Inference service error {resp.status}: {payload.get('error')}")
+            return payload
+        finally:
+            conn.close()
+
+    def predict(self, tensor):
+        buf = io.BytesIO()
+        np.save(buf, tensor.numpy().astype(np.float32, copy=False), allow_pickle=False)
+        payload = self._request("POST", "/predict", buf.getvalue())
+        return np.asarray(payload["probabilities"], dtype=np.float32)
+
+    def predict_batch(self, batch):
+        # The service queues the N images together, so they share a forward pass
+        return self.predict(batch)
+
+# ── Per-lead classification ──────────────────────────────────────────────
+def classify_leads(predictor, leads):
+    """Classify each lead crop on its own, all in one batched forward pass.
+
+    ``leads`` is the (12, h, w) stack from ``ECGSignals.leads``. Returns
+    (per-lead probabilities of shape (12, classes), whole-ECG probabilities),
+    where the whole-ECG decision is the mean of the per-lead probabilities.
+    """
+    from src.data_transforms import lead_batch
+    lead_probs = np.asarray(predictor.predict_batch(lead_batch(leads)), dtype=np.float32)
+    return lead_probs, lead_probs.mean(axis=0)
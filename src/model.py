@@ -0,0 +1,70 @@
+# src/model.py
+
+import time
+
+import torch
+import torch.nn as nn
+from torchvision import models
+
+from src.data_transforms import IMG_SIZE, MEAN, STD
+
+# ── Constants ─────────────────────────────────────────────────────────────
+CLASS_NAMES        = ['Abnormal Heartbeat', 'History of MI', 'Myocardial Infarction', 'Normal']
+DEFAULT_CHECKPOINT = "models/best_model.pth"
+CHECKPOINT_FORMAT  = 1
+
+ARCHITECTURES = {"resnet18": models.resnet18}
+
+def build_model(num_classes=len(CLASS_NAMES), arch="resnet18", pretrained=False):
+    # ImageNet weights are only needed as a starting point for training
+    m = ARCHITECTURES[arch](weights="IMAGENET1K_V1" if pretrained else None)
+    m.fc = nn.Linear(m.fc.in_features, num_classes)
+    return m
+
+def make_checkpoint(state_dict, class_names, arch="resnet18"):
+    """Weights together with everything needed to rebuild and feed the model."""
+    return {
+        "format":      CHECKPOINT_FORMAT,
+        "arch":        arch,
+        "class_names": list(class_names),
+        "input_size":  IMG_SIZE,
+        "mean":        MEAN,
+        "std":         STD,
+        "state_dict":  state_dict,
+    }
+
+def save_checkpoint(model, path, class_names, arch="resnet18"):
+    torch.save(make_checkpoint(model.state_dict(), class_names, arch), path)
+
+def load_checkpoint(path):
+    """Return (state_dict, metadata); tensors stay memory-mapped from ``path``."""
+    ckpt = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    if "state_dict" in ckpt:
+        metadata = {k: v for k, v in ckpt.items() if k != "state_dict"}
+        return ckpt["state_dict"], metadata
+
+    # Legacy checkpoints are a bare state_dict; assume the original training setup
+    metadata = {
+        "format": 0, "arch": "resnet18", "class_names": list(CLASS_NAMES),
+        "input_size": IMG_SIZE, "mean": MEAN, "std": STD,
+    }
+    return ckpt, metadata
+
+def load_model(checkpoint_path=DEFAULT_CHECKPOINT, device="cpu"):
+    start = time.perf_counter()
+    state_dict, metadata = load_checkpoint(checkpoint_path)
+    t_read = time.perf_counter()
+
+    # Build on the meta device: no random init and no second copy of the weights,
+    # the memory-mapped checkpoint tensors are assigned straight into the module
+    with torch.device("meta"):
+        m = build_model(len(metadata["class_names"]), metadata["arch"])
+    m.load_state_dict(state_dict, assign=True)
+    m.to(device)
+    m.eval()
+    m.metadata = metadata
+
+    end = time.perf_counter()
+    print(f"Loaded {metadata['arch']} from {checkpoint_path} in {(end - start) * 1000:.1f} ms "
+          f"(read {(t_read - start) * 1000:.1f} ms, build+assign {(end - t_read) * 1000:.1f} ms)")
+    return m
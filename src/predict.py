@@ -0,0 +1,137 @@
+# src/predict.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import csv
+import json
+
+import torch
+from torch.utils.data import Dataset, DataLoader
+
+from src.backends import BACKENDS, load_backend
+from src.data_transforms import IMG_SIZE, val_transforms
+from src.runtime import configure_threads
+from src.utils.decoding import open_reduced
+from src.utils.paths import collect_image_paths
+
+# ── Input collection ─────────────────────────────────────────────────────
+class ECGImageDataset(Dataset):
+    """Decodes and transforms ECG images inside DataLoader workers.
+
+    Unreadable files yield a zero tensor plus an error message, so one corrupt
+    image does not abort a whole archive run.
+    """
+
+    def __init__(self, paths, transform=val_transforms):
+        self.paths = paths
+        self.transform = transform
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, idx):
+        path = self.paths[idx]
+        try:
+            # The transforms resize to IMG_SIZE anyway; decode no larger than needed
+            with open(path, "rb") as f:
+                image, _ = open_reduced(f.read(), min_size=(IMG_SIZE, IMG_SIZE))
+            return self.transform(image), idx, ""
+        except Exception as e:
+            return torch.zeros(3, IMG_SIZE, IMG_SIZE), idx, f"{type(e).__name__}: {e}"
+
+# ── Inference ────────────────────────────────────────────────────────────
+def predict_paths(backend, paths, batch_size=64, num_workers=4):
+    """Yield (path, probabilities, error) for every path, batch by batch."""
+    dataset = ECGImageDataset(paths)
+    loader = DataLoader(
+        dataset, batch_size=batch_size, shuffle=False,
+        num_workers=num_workers, pin_memory=(backend.device.type == "cuda"),
+    )
+
+    for images, indices, errors in loader:
+        probs = backend.predict(images)
+        for idx, p, err in zip(indices.tolist(), probs, errors):
+            yield paths[idx], (None if err else p), err
+
+# ── Output writers ───────────────────────────────────────────────────────
+class CSVResultWriter:
+    def __init__(self, f, class_names):
+        self.class_names = class_names
+        self.writer = csv.writer(f)
+        self.writer.writerow(["path", "prediction", *class_names, "error"])
+
+    def write(self, path, probs, error):
+        if probs is None:
+            self.writer.writerow([path, "", *([""] * len(self.class_names)), error])
+        else:
+            pred = self.class_names[int(probs.argmax())]
+            self.writer.writerow([path, pred, *(f"{p:.6f}" for p in probs), ""])
+
+class JSONLResultWriter:
+    def __init__(self, f, class_names):
+        self.f = f
+        self.class_names = class_names
+
+    def write(self, path, probs, error):
+        record = {"path": path}
+        if probs is None:
+            record["error"] = error
+        else:
+            record["prediction"] = self.class_names[int(probs.argmax())]
+            record["probabilities"] = {
+                name: float(p) for name, p in zip(self.class_names, probs)
+            }
+        self.f.write(json.dumps(record) + "\n")
+
+WRITERS = {"csv": CSVResultWriter, "jsonl": JSONLResultWriter}
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-score ECG images")
+    parser.add_argument("inputs",        nargs="*",
+                        help="Image files, directories or glob patterns")
+    parser.add_argument("--file-list",   type=str,   default=None,
+                        help="Text file with one image path per line")
+    parser.add_argument("--backend",     type=str,   default=None, choices=sorted(BACKENDS),
+                        help="Inference backend (default: $CARDIOSCAN_BACKEND or eager)")
+    parser.add_argument("--model-path",  type=str,   default=None,
+                        help="Checkpoint or exported model for the chosen backend")
+    parser.add_argument("--output",      type=str,   default="predictions.csv")
+    parser.add_argument("--format",      type=str,   default=None, choices=sorted(WRITERS),
+                        help="Output format (defaults to the --output extension)")
+    parser.add_argument("--batch-size",  type=int,   default=64)
+    parser.add_argument("--num-workers", type=int,   default=4)
+    args = parser.parse_args()
+
+    paths = collect_image_paths(args.inputs, args.file_list)
+    if not paths:
+        parser.error("no input images found")
+
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if fmt not in WRITERS:
+        parser.error(f"cannot infer output format from '{args.output}', pass --format")
+
+    configure_threads()
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    backend = load_backend(args.backend, args.model_path, device)
+    print(f"Scoring {len(paths)} images with the {backend.name} backend on {backend.device} "
+          f"(batch size {args.batch_size})")
+
+    n_ok = n_failed = 0
+    with open(args.output, "w", newline="") as f:
+        writer = WRITERS[fmt](f, backend.class_names)
+        for path, probs, error in predict_paths(
+            backend, paths, args.batch_size, args.num_workers
+        ):
+            writer.write(path, probs, error)
+            if probs is None:
+                n_failed += 1
+            else:
+                n_ok += 1
+
+    print(f"Scored {n_ok} images, {n_failed} failed → {args.output}")
+
+if __name__ == "__main__":
+    main()
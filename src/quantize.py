@@ -0,0 +1,175 @@
+# src/quantize.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import copy
+import io
+import json
+import statistics
+import subprocess
+import tempfile
+import time
+
+import torch
+from torch.ao.quantization import get_default_qconfig_mapping
+from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+from torch.utils.data import DataLoader, Subset
+from torchvision.datasets import ImageFolder
+
+from src.backends import DEFAULT_PATHS, torchscript_extra_files
+from src.data_transforms import IMG_SIZE, test_transforms, val_transforms
+from src.model import load_model
+from src.runtime import peak_rss_mb
+
+# ── Quantization ─────────────────────────────────────────────────────────
+def quantize_model(model, calib_loader, engine="x86"):
+    """Static INT8 post-training quantization in FX graph mode."""
+    torch.backends.quantized.engine = engine
+    qconfig_mapping = get_default_qconfig_mapping(engine)
+    example = (torch.randn(1, 3, IMG_SIZE, IMG_SIZE),)
+
+    prepared = prepare_fx(copy.deepcopy(model).eval(), qconfig_mapping, example)
+    # Calibration: observers record activation ranges on real validation images
+    with torch.no_grad():
+        for images, _ in calib_loader:
+            prepared(images)
+    return convert_fx(prepared)
+
+def save_torchscript(model, path, metadata):
+    example = torch.randn(1, 3, IMG_SIZE, IMG_SIZE)
+    with torch.no_grad():
+        traced = torch.jit.freeze(torch.jit.trace(model, example))
+    # The checkpoint metadata (class names, input size) travels with the artifact
+    traced.save(path, _extra_files=torchscript_extra_files(metadata))
+    return traced
+
+def serialized_size(model):
+    buf = io.BytesIO()
+    torch.jit.save(model, buf)
+    return buf.tell()
+
+# ── Evaluation ───────────────────────────────────────────────────────────
+def accuracy(model, loader):
+    correct = total = 0
+    with torch.inference_mode():
+        for images, labels in loader:
+            preds = model(images).argmax(1)
+            correct += (preds == labels).sum().item()
+            total += labels.numel()
+    return correct / total
+
+def latency(model, batch_size, runs=30, warmup=5):
+    """Median forward-pass latency in milliseconds for one batch size."""
+    batch = torch.randn(batch_size, 3, IMG_SIZE, IMG_SIZE)
+    timings = []
+    with torch.inference_mode():
+        for i in range(warmup + runs):
+            start = time.perf_counter()
+            model(batch)
+            if i >= warmup:
+                timings.append((time.perf_counter() - start) * 1000.0)
+    return statistics.median(timings)
+
+# ── Runtime memory (measured in a fresh interpreter per model) ───────────
+def measure_memory(path, engine, batch_size):
+    """Peak RSS growth in MB from loading a TorchScript model and from one
+    forward pass, relative to the interpreter with torch already imported."""
+    torch.backends.quantized.engine = engine
+    batch = torch.randn(batch_size, 3, IMG_SIZE, IMG_SIZE)
+    baseline = peak_rss_mb()
+    model = torch.jit.load(path, map_location="cpu").eval()
+    loaded = peak_rss_mb()
+    with torch.inference_mode():
+        model(batch)
+    return {"load_rss_mb": loaded - baseline, "forward_rss_mb": peak_rss_mb() - baseline}
+
+def runtime_memory(path, engine, batch_size):
+    # A fresh process per model, so neither model's allocations inflate the other's peak
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--memory-worker", path,
+                           "--engine", engine, "--batch-size", str(batch_size)],
+                          capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="INT8 post-training quantization of the ECG classifier")
+    parser.add_argument("--data-dir",    type=str,   default="data",
+                        help="Root folder with val/ (calibration) and test/ (report) subfolders")
+    parser.add_argument("--checkpoint",  type=str,   default=DEFAULT_PATHS["eager"])
+    parser.add_argument("--output",      type=str,   default=DEFAULT_PATHS["int8"])
+    parser.add_argument("--report",      type=str,   default="models/quantization_report.json")
+    parser.add_argument("--engine",      type=str,   default="x86", choices=["x86", "fbgemm"])
+    parser.add_argument("--calib-size",  type=int,   default=256,
+                        help="Number of validation images used for calibration")
+    parser.add_argument("--batch-size",  type=int,   default=32)
+    parser.add_argument("--num-workers", type=int,   default=4)
+    parser.add_argument("--seed",        type=int,   default=42)
+    parser.add_argument("--memory-worker", type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.memory_worker:
+        print(json.dumps(measure_memory(args.memory_worker, args.engine, args.batch_size)))
+        return
+
+    fp32 = load_model(args.checkpoint)
+
+    val_ds = ImageFolder(os.path.join(args.data_dir, "val"), transform=val_transforms)
+    generator = torch.Generator().manual_seed(args.seed)
+    calib_idx = torch.randperm(len(val_ds), generator=generator)[:args.calib_size].tolist()
+    calib_loader = DataLoader(Subset(val_ds, calib_idx), batch_size=args.batch_size,
+                              num_workers=args.num_workers)
+
+    print(f"Calibrating on {len(calib_idx)} validation images ({args.engine})...")
+    int8 = quantize_model(fp32, calib_loader, args.engine)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    int8_ts = save_torchscript(int8, args.output, fp32.metadata)
+    print(f"INT8 model written to {args.output}")
+
+    test_ds = ImageFolder(os.path.join(args.data_dir, "test"), transform=test_transforms)
+    test_loader = DataLoader(test_ds, batch_size=args.batch_size, shuffle=False,
+                             num_workers=args.num_workers)
+
+    # Compare frozen TorchScript graphs on both sides so only precision differs
+    with torch.no_grad():
+        fp32_ts = torch.jit.freeze(torch.jit.trace(fp32, torch.randn(1, 3, IMG_SIZE, IMG_SIZE)))
+    report = {"engine": args.engine, "calibration_images": len(calib_idx),
+              "test_images": len(test_ds), "memory_batch_size": args.batch_size}
+    with tempfile.TemporaryDirectory() as tmp:
+        fp32_path = os.path.join(tmp, "fp32.pt")
+        fp32_ts.save(fp32_path)
+        for name, model, path in (("fp32", fp32_ts, fp32_path), ("int8", int8_ts, args.output)):
+            memory = runtime_memory(path, args.engine, args.batch_size)
+            report[name] = {
+                "test_accuracy":  accuracy(model, test_loader),
+                "latency_ms_b1":  latency(model, 1),
+                "latency_ms_b32": latency(model, 32),
+                "size_mb":        serialized_size(model) / 1e6,
+                "load_rss_mb":    memory["load_rss_mb"],
+                "forward_rss_mb": memory["forward_rss_mb"],
+            }
+    report["speedup_b1"]  = report["fp32"]["latency_ms_b1"] / report["int8"]["latency_ms_b1"]
+    report["speedup_b32"] = report["fp32"]["latency_ms_b32"] / report["int8"]["latency_ms_b32"]
+    report["size_ratio"]  = report["fp32"]["size_mb"] / report["int8"]["size_mb"]
+    report["memory_ratio"] = report["fp32"]["forward_rss_mb"] / max(report["int8"]["forward_rss_mb"], 1e-6)
+
+    print(f"\n{'':6s}{'Test Acc':>10s}{'b1 ms':>10s}{'b32 ms':>10s}{'Size MB':>10s}"
+          f"{'Load MB':>10s}{f'b{args.batch_size} MB':>10s}")
+    for name in ("fp32", "int8"):
+        r = report[name]
+        print(f"{name:6s}{r['test_accuracy']:10.4f}{r['latency_ms_b1']:10.2f}"
+              f"{r['latency_ms_b32']:10.2f}{r['size_mb']:10.2f}"
+              f"{r['load_rss_mb']:10.1f}{r['forward_rss_mb']:10.1f}")
+    print(f"\nSpeedup: {report['speedup_b1']:.2f}x (b1), {report['speedup_b32']:.2f}x (b32)  "
+          f"Size reduction: {report['size_ratio']:.2f}x  "
+          f"Runtime memory reduction: {report['memory_ratio']:.2f}x")
+    print(f"Load MB / b{args.batch_size} MB: peak RSS growth from loading the model / from loading it "
+          f"and running one batch, each in a fresh process")
+
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# src/runtime.py
+
+import os
+import sys
+import threading
+
+# ── Configuration ────────────────────────────────────────────────────────
+# Each setting can come from the environment or from a TOML file named by
+# CARDIOSCAN_CONFIG (keys under a [runtime] table); the environment wins.
+SETTINGS = {
+    "intraop_threads":           "CARDIOSCAN_INTRAOP_THREADS",
+    "interop_threads":           "CARDIOSCAN_INTEROP_THREADS",
+    "opencv_threads":            "CARDIOSCAN_OPENCV_THREADS",
+    "max_concurrent_inference":  "CARDIOSCAN_MAX_CONCURRENT_INFERENCE",
+    "max_decode_pixels":         "CARDIOSCAN_MAX_DECODE_PIXELS",
+}
+DEFAULTS = {
+    "intraop_threads":          None,   # None leaves the library default
+    "interop_threads":          None,
+    "opencv_threads":           None,
+    "max_concurrent_inference": 1,
+    "max_decode_pixels":        4_000_000,
+}
+
+def _read_config_file(path):
+    try:
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except ImportError:
+        # Python < 3.11
+        import toml
+        return toml.load(path)
+
+def load_runtime_config(path=None):
+    """Merge defaults, the optional TOML config file and environment variables."""
+    config = dict(DEFAULTS)
+    path = path or os.environ.get("CARDIOSCAN_CONFIG")
+    if path:
+        section = _read_config_file(path).get("runtime", {})
+        unknown = set(section) - set(SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown [runtime] settings in {path}: {sorted(unknown)}")
+        config.update(section)
+    for key, env in SETTINGS.items():
+        if os.environ.get(env):
+            config[key] = int(os.environ[env])
+    return config
+
+# ── Thread pools ─────────────────────────────────────────────────────────
+_configured = None
+_configure_lock = threading.Lock()
+
+def configure_threads(config=None):
+    """Apply the torch and OpenCV thread settings once per process.
+
+    Must run before the first forward pass: PyTorch only accepts an inter-op
+    thread count before its inter-op pool has started.
+    """
+    global _configured
+    with _configure_lock:
+        if _configured is not None:
+            return _configured
+        config = config or load_runtime_config()
+
+        # torch is only imported to change its settings, so processes that
+        # never run a model (decoding workers, benchmarks) don't pay for it
+        if config["intraop_threads"]:
+            import torch
+            torch.set_num_threads(config["intraop_threads"])
+        if config["interop_threads"]:
+            import torch
+            try:
+                torch.set_num_interop_threads(config["interop_threads"])
+            except RuntimeError:
+                print("Warning: inter-op threads already started; "
+                      "CARDIOSCAN_INTEROP_THREADS ignored")
+        if config["opencv_threads"] is not None:
+            import cv2
+            cv2.setNumThreads(config["opencv_threads"])
+
+        _configured = config
+        return config
+
+# ── Memory ───────────────────────────────────────────────────────────────
+def peak_rss_mb():
+    """Peak resident memory of this process in MB."""
+    # ru_maxrss survives fork and exec on Linux, so a worker would report the
+    # parent's peak; the kernel's per-address-space high-water mark does not
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class InferenceLimiter:
+    """Caps concurrent forward passes in this process.
+
+    Streamlit serves each session on its own thread; without a cap, N sessions
+    run N forward passes that each try to use every intra-op thread.
+    """
+
+    def __init__(self, max_concurrent=1):
+        self.max_concurrent = max_concurrent
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def run(self, fn, *args, **kwargs):
+        with self._slots:
+            return fn(*args, **kwargs)
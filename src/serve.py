@@ -0,0 +1,186 @@
+# src/serve.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import asyncio
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+
+from src.backends import BACKENDS, load_backend
+from src.data_transforms import IMG_SIZE
+from src.runtime import configure_threads
+
+# ── Micro-batching ───────────────────────────────────────────────────────
+class MicroBatcher:
+    """Coalesces single-image requests into batched forward passes.
+
+    A batch is flushed when it reaches ``max_batch_size`` or when the oldest
+    queued request has waited ``max_wait_ms``. Forward passes run one at a time
+    on a dedicated thread so they get all intra-op threads and the event loop
+    stays free to accept requests.
+    """
+
+    def __init__(self, backend, max_batch_size=16, max_wait_ms=5.0):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="forward")
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, tensor):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((tensor, future))
+        return await future
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _forward(self, tensors):
+        return self.backend.predict(torch.stack(tensors))
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            tensors = [t for t, _ in batch]
+            try:
+                probs = await loop.run_in_executor(self.executor, self._forward, tensors)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+            for (_, future), p in zip(batch, probs):
+                if not future.done():
+                    future.set_result(p)
+
+# ── HTTP front end ───────────────────────────────────────────────────────
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+
+class InferenceServer:
+    def __init__(self, batcher):
+        self.batcher = batcher
+
+    async def route(self, method, path, body):
+        if method == "GET" and path == "/info":
+            return 200, {
+                "model_hash": self.batcher.backend.fingerprint,
+                "backend": self.batcher.backend.name,
+                "class_names": self.batcher.backend.class_names,
+                "max_batch_size": self.batcher.max_batch_size,
+                "max_wait_ms": self.batcher.max_wait * 1000.0,
+                "requests": self.batcher.requests,
+                "batches": self.batcher.batches,
+            }
+        if method == "POST" and path == "/predict":
+            try:
+                array = np.load(io.BytesIO(body), allow_pickle=False)
+            except Exception as e:
+                return 400, {"error": f"could not parse tensor: {e}"}
+            if array.shape[-3:] != (3, IMG_SIZE, IMG_SIZE) or array.ndim not in (3, 4):
+                return 400, {"error": f"expected shape ([N,] 3, {IMG_SIZE}, {IMG_SIZE}), got {array.shape}"}
+            tensor = torch.from_numpy(array.astype(np.float32, copy=False))
+            if tensor.ndim == 3:
+                probs = await self.batcher.submit(tensor)
+                return 200, {"probabilities": probs.tolist()}
+            # A stack (e.g. the 12 leads of one ECG) is queued all at once, so
+            # the batcher coalesces it into as few forward passes as it can
+            probs = await asyncio.gather(*(self.batcher.submit(t) for t in tensor))
+            return 200, {"probabilities": [p.tolist() for p in probs]}
+        return 404, {"error": f"no route for {method} {path}"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                try:
+                    status, payload = await self.route(method, path, body)
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(backend, host, port, max_batch_size, max_wait_ms):
+    batcher = MicroBatcher(backend, max_batch_size, max_wait_ms)
+    server = InferenceServer(batcher)
+
+    batch_task = asyncio.create_task(batcher.run())
+    srv = await asyncio.start_server(server.handle, host, port)
+    print(f"Serving {backend.path} ({backend.name}) on http://{host}:{port} "
+          f"(max batch {max_batch_size}, max wait {max_wait_ms} ms)")
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        batch_task.cancel()
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batching ECG inference service")
+    parser.add_argument("--backend",        type=str,   default=None, choices=sorted(BACKENDS),
+                        help="Inference backend (default: $CARDIOSCAN_BACKEND or eager)")
+    parser.add_argument("--model-path",     type=str,   default=None)
+    parser.add_argument("--host",           type=str,   default="127.0.0.1")
+    parser.add_argument("--port",           type=int,   default=8765)
+    parser.add_argument("--max-batch-size", type=int,   default=16)
+    parser.add_argument("--max-wait-ms",    type=float, default=5.0,
+                        help="Longest a request waits for others to join its batch")
+    args = parser.parse_args()
+
+    configure_threads()
+    backend = load_backend(args.backend, args.model_path)
+    asyncio.run(serve(backend, args.host, args.port,
+                      args.max_batch_size, args.max_wait_ms))
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,86 @@
 # src/train.py
 
-import argparse
+import sys
 import os
-import copy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import time
 
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torchvision import models
-from torch.utils.data import DataLoader
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, DistributedSampler
 from torchvision.datasets import ImageFolder
-from data_transforms import train_transforms, val_transforms, test_transforms
+from src.data_transforms import BatchAugment, train_transforms, uint8_transforms, val_transforms, test_transforms
+from src.dataset_cache import CACHE_SIZE, cached_split
+from src.distributed import (ShardSampler, all_gather_object, all_reduce_sum, barrier, broadcast_buffers,
+                             cleanup, init_distributed, is_distributed, is_main_process)
+from src.checkpointing import AsyncCheckpointer, StateBuffer, load_training_state, rng_state, training_state
+from src.model import build_model, load_checkpoint, make_checkpoint
+from src.runtime import configure_threads
+
+def get_dataloaders(data_dir, batch_size, num_workers, cache_dir=None, cache_size=CACHE_SIZE,
+                    augment="pil", local_rank=0):
+    # With batched augmentation the loader only delivers uint8 tensors and
+    # BatchAugment runs on whole batches in the training loop
+    if cache_dir:
+        # One process per machine builds stale caches while the others wait
+        if local_rank == 0:
+            for split in ("train", "val", "test"):
+                cached_split(data_dir, cache_dir, split, size=cache_size)
+        barrier()
+        # Decoded once into memory-mapped arrays, rebuilt only when the source folders change
+        train_tf = None if augment == "batch" else train_transforms
+        train_ds = cached_split(data_dir, cache_dir, "train", train_tf,       cache_size)
+        val_ds   = cached_split(data_dir, cache_dir, "val",   val_transforms,  cache_size)
+        test_ds  = cached_split(data_dir, cache_dir, "test",  test_transforms, cache_size)
+    else:
+        train_tf = uint8_transforms if augment == "batch" else train_transforms
+        train_ds = ImageFolder(os.path.join(data_dir, "train"), transform=train_tf)
+        val_ds   = ImageFolder(os.path.join(data_dir, "val"),   transform=val_transforms)
+        test_ds  = ImageFolder(os.path.join(data_dir, "test"),  transform=test_transforms)
 
-def get_dataloaders(data_dir, batch_size, num_workers):
-    train_ds = ImageFolder(os.path.join(data_dir, "train"), transform=train_transforms)
-    val_ds   = ImageFolder(os.path.join(data_dir, "val"),   transform=val_transforms)
-    test_ds  = ImageFolder(os.path.join(data_dir, "test"),  transform=test_transforms)
+    # Under torchrun each process trains on its own shard of every split
+    train_sampler = DistributedSampler(train_ds, shuffle=True) if is_distributed() else None
+    val_sampler   = ShardSampler(val_ds)  if is_distributed() else None
+    test_sampler  = ShardSampler(test_ds) if is_distributed() else None
 
-    train_loader = DataLoader(train_ds, batch_size=batch_size, shuffle=True,
-                              num_workers=num_workers, pin_memory=True)
+    train_loader = DataLoader(train_ds, batch_size=batch_size, shuffle=train_sampler is None,
+                              sampler=train_sampler, num_workers=num_workers, pin_memory=True)
     val_loader   = DataLoader(val_ds,   batch_size=batch_size, shuffle=False,
-                              num_workers=num_workers, pin_memory=True)
+                              sampler=val_sampler,   num_workers=num_workers, pin_memory=True)
     test_loader  = DataLoader(test_ds,  batch_size=batch_size, shuffle=False,
-                              num_workers=num_workers, pin_memory=True)
+                              sampler=test_sampler,  num_workers=num_workers, pin_memory=True)
 
     return train_loader, val_loader, test_loader, train_ds.classes
 
-def train_one_epoch(model, loader, criterion, optimizer, device):
+def autocast(device, amp):
+    """bfloat16 autocast on ``device`` when ``amp`` is set; a no-op otherwise.
+
+    bfloat16 keeps FP32's exponent range, so unlike float16 it needs no
+    gradient scaling."""
+    return torch.autocast(device_type=device.type, dtype=torch.bfloat16, enabled=amp)
+
+def train_one_epoch(model, loader, criterion, optimizer, device, augment=None,
+                    amp=False, channels_last=False):
     model.train()
     running_loss = 0.0
     correct = 0
     total = 0
+    start = time.perf_counter()
 
     for images, labels in loader:
         images, labels = images.to(device), labels.to(device)
+        if augment is not None:
+            images = augment(images)
+        if channels_last:
+            images = images.contiguous(memory_format=torch.channels_last)
         optimizer.zero_grad()
-        outputs = model(images)
-        loss = criterion(outputs, labels)
+        with autocast(device, amp):
+            outputs = model(images)
+            loss = criterion(outputs, labels)
         loss.backward()
         optimizer.step()
 
@@ -45,19 +89,25 @@ def train_one_epoch(model, loader, criterion, optimizer, device):
         correct += (preds == labels).sum().item()
         total += images.size(0)
 
+    # Totals over all processes
+    running_loss, correct, total = all_reduce_sum(running_loss, correct, total)
     epoch_loss = running_loss / total
     epoch_acc  = correct / total
-    return epoch_loss, epoch_acc
+    images_per_sec = total / (time.perf_counter() - start)
+    return epoch_loss, epoch_acc, images_per_sec
 
-def evaluate(model, loader, criterion, device):
+def evaluate(model, loader, criterion, device, amp=False, channels_last=False):
     model.eval()
     running_loss = 0.0
     correct = 0
     total = 0
+    start = time.perf_counter()
 
-    with torch.no_grad():
+    with torch.no_grad(), autocast(device, amp):
         for images, labels in loader:
             images, labels = images.to(device), labels.to(device)
+            if channels_last:
+                images = images.contiguous(memory_format=torch.channels_last)
             outputs = model(images)
             loss = criterion(outputs, labels)
 
@@ -66,9 +116,12 @@ def evaluate(model, loader, criterion, device):
             correct += (preds == labels).sum().item()
             total += images.size(0)
 
+    # Totals over all processes
+    running_loss, correct, total = all_reduce_sum(running_loss, correct, total)
     epoch_loss = running_loss / total
     epoch_acc  = correct / total
-    return epoch_loss, epoch_acc
+    images_per_sec = total / (time.perf_counter() - start)
+    return epoch_loss, epoch_acc, images_per_sec
 
 def main():
     parser = argparse.ArgumentParser(description="Train ECG CNN")
@@ -79,50 +132,129 @@ def main():
     parser.add_argument("--lr",          type=float, default=1e-3)
     parser.add_argument("--num-workers", type=int,   default=4)
     parser.add_argument("--save-path",   type=str,   default="models/best_model.pth")
+    parser.add_argument("--state-path",  type=str,   default="models/train_state.pth",
+                        help="Full training state (model, optimizer, epoch, RNG) for --resume")
+    parser.add_argument("--save-every",  type=int,   default=1, help="Write the training state every N epochs")
+    parser.add_argument("--resume",      action="store_true",
+                        help="Continue from --state-path if it exists")
+    parser.add_argument("--cache-dir",   type=str,   default=None,
+                        help="Pre-decode images into memory-mapped caches here (see src.dataset_cache)")
+    parser.add_argument("--cache-size",  type=int,   default=CACHE_SIZE,
+                        help="Stored resolution of cached images")
+    parser.add_argument("--augment",     type=str,   default="pil", choices=["pil", "batch"],
+                        help="Augment each PIL image in the loader, or whole uint8 batches on the device")
+    parser.add_argument("--amp",         action="store_true",
+                        help="bfloat16 autocast for training and evaluation (CPU or CUDA)")
+    parser.add_argument("--channels-last", action="store_true",
+                        help="channels_last memory format for the model and input batches")
+    parser.add_argument("--compile",     action="store_true", help="torch.compile the model")
     args = parser.parse_args()
 
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    print(f"Using device: {device}")
+    rank, world_size, local_rank = init_distributed()
+    # Only the first process reports and writes checkpoints
+    log = print if is_main_process() else (lambda *a, **k: None)
+
+    config = configure_threads()
+    if torch.cuda.is_available():
+        device = torch.device("cuda", local_rank)
+        torch.cuda.set_device(device)
+    else:
+        device = torch.device("cpu")
+        if world_size > 1 and not config["intraop_threads"]:
+            # torchrun pins OMP_NUM_THREADS=1; share the cores among this machine's processes instead
+            local_world_size = int(os.environ.get("LOCAL_WORLD_SIZE", "1"))
+            torch.set_num_threads(max(1, (os.cpu_count() or 1) // local_world_size))
+    log(f"Using device: {device}" + (f"  ({world_size} processes, gloo, "
+                                     f"{torch.get_num_threads()} threads each)" if world_size > 1 else ""))
 
     train_loader, val_loader, test_loader, classes = get_dataloaders(
-        args.data_dir, args.batch_size, args.num_workers
+        args.data_dir, args.batch_size, args.num_workers, args.cache_dir, args.cache_size, args.augment,
+        local_rank
     )
     num_classes = len(classes)
-    print("Classes:", classes)
+    log("Classes:", classes)
 
     # Load pretrained ResNet-18 and replace final layer
-    model = models.resnet18(pretrained=True)
-    in_features = model.fc.in_features
-    model.fc = nn.Linear(in_features, num_classes)
+    model = build_model(num_classes, pretrained=True)
     model = model.to(device)
+    if args.channels_last:
+        model = model.to(memory_format=torch.channels_last)
+    if args.amp and device.type == "cuda" and not torch.cuda.is_bf16_supported():
+        log("Warning: this GPU has no native bfloat16 support; --amp may be slower")
 
     criterion = nn.CrossEntropyLoss()
     optimizer = optim.Adam(model.parameters(), lr=args.lr)
 
-    best_model_wts = copy.deepcopy(model.state_dict())
-    best_acc = 0.0
+    start_epoch, best_acc = 1, 0.0
+    if args.resume and os.path.exists(args.state_path):
+        last_epoch, best_acc = load_training_state(args.state_path, model, optimizer, classes, rank=rank)
+        start_epoch = last_epoch + 1
+        log(f"Resumed from {args.state_path} after epoch {last_epoch} (best Val Acc: {best_acc:.4f})")
+
+    # The DDP and compiled wrappers share parameters with ``model``, whose
+    # state_dict keeps its original keys for checkpoints. DDP broadcasts
+    # rank 0's weights on construction, so all processes start identical.
+    # Evaluation needs no gradient sync and its shards may differ in length,
+    # so it runs on the unwrapped model.
+    net = DistributedDataParallel(model) if world_size > 1 else model
+    eval_net = model
+    if args.compile:
+        net = torch.compile(net)
+        eval_net = torch.compile(model) if world_size > 1 else net
+    log(f"Precision: {'bfloat16 autocast' if args.amp else 'float32'}  "
+        f"Memory format: {'channels_last' if args.channels_last else 'contiguous'}  "
+        f"torch.compile: {'on' if args.compile else 'off'}")
+    fast = {"amp": args.amp, "channels_last": args.channels_last}
 
-    for epoch in range(1, args.epochs + 1):
-        train_loss, train_acc = train_one_epoch(model, train_loader, criterion, optimizer, device)
-        val_loss,   val_acc   = evaluate(model, val_loader, criterion, device)
+    augment = BatchAugment() if args.augment == "batch" else None
 
-        print(f"Epoch {epoch}/{args.epochs}  "
-              f"Train Loss: {train_loss:.4f}  Train Acc: {train_acc:.4f}  "
-              f"Val Loss:   {val_loss:.4f}  Val Acc:   {val_acc:.4f}")
+    # Checkpoints are snapshotted into reused CPU buffers and written in the
+    # background; the best checkpoint's buffer doubles as the best weights
+    checkpointer = AsyncCheckpointer()
+    best_buffer = StateBuffer()
+    best_state = None
 
-        # Save best
+    for epoch in range(start_epoch, args.epochs + 1):
+        if isinstance(train_loader.sampler, DistributedSampler):
+            train_loader.sampler.set_epoch(epoch)
+        train_loss, train_acc, train_ips = train_one_epoch(net, train_loader, criterion, optimizer, device,
+                                                           augment, **fast)
+        broadcast_buffers(model)
+        val_loss,   val_acc,   val_ips   = evaluate(eval_net, val_loader, criterion, device, **fast)
+
+        log(f"Epoch {epoch}/{args.epochs}  "
+            f"Train Loss: {train_loss:.4f}  Train Acc: {train_acc:.4f}  "
+            f"Val Loss:   {val_loss:.4f}  Val Acc:   {val_acc:.4f}  "
+            f"Train: {train_ips:.1f} img/s  Val: {val_ips:.1f} img/s")
+
+        # Save best; val_acc is already reduced, so every process agrees on it
         if val_acc > best_acc:
             best_acc = val_acc
-            best_model_wts = copy.deepcopy(model.state_dict())
-            torch.save(model.state_dict(), args.save_path)
-            print(f"→ New best model saved at epoch {epoch} (Val Acc: {val_acc:.4f})")
+            if is_main_process():
+                best_state = checkpointer.save(args.save_path,
+                                               make_checkpoint(model.state_dict(), classes))["state_dict"]
+            else:
+                best_state = best_buffer.copy(model.state_dict())
+            log(f"→ New best model saved at epoch {epoch} (Val Acc: {val_acc:.4f})")
+
+        if epoch % args.save_every == 0 or epoch == args.epochs:
+            # Weights and optimizer state are identical across processes; RNG state is not
+            rng = all_gather_object(rng_state()) if world_size > 1 else None
+            if is_main_process():
+                checkpointer.save(args.state_path,
+                                  training_state(model, optimizer, epoch, best_acc, classes, rng=rng))
+    checkpointer.close()
 
     # Load best for final test
-    model.load_state_dict(best_model_wts)
-    test_loss, test_acc = evaluate(model, test_loader, criterion, device)
-    print(f"\nTest Loss: {test_loss:.4f}  Test Acc: {test_acc:.4f}")
-    print(f"Best validation accuracy: {best_acc:.4f}")
-    print(f"Model checkpoint stored at: {args.save_path}")
+    if best_state is None and args.resume and os.path.exists(args.save_path):
+        best_state, _ = load_checkpoint(args.save_path)
+    if best_state is not None:
+        model.load_state_dict(best_state)
+    test_loss, test_acc, _ = evaluate(eval_net, test_loader, criterion, device, **fast)
+    log(f"\nTest Loss: {test_loss:.4f}  Test Acc: {test_acc:.4f}")
+    log(f"Best validation accuracy: {best_acc:.4f}")
+    log(f"Model checkpoint stored at: {args.save_path}")
+    cleanup()
 
 if __name__ == "__main__":
     main()
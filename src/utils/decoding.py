@@ -0,0 +1,111 @@
+import io
+from functools import cache, cached_property
+
+import numpy as np
+from PIL import Image
+
+from src.runtime import load_runtime_config
+
+# Modes Image.reduce accepts; anything else is converted to RGB before reducing
+REDUCIBLE_MODES = ("L", "LA", "RGB", "RGBA", "CMYK")
+
+def _reduction_factor(size, min_size, max_pixels):
+    """Largest integer downscale that keeps ``size`` at or above ``min_size``,
+    raised if needed so the result fits in ``max_pixels``."""
+    w, h = size
+    factor = 1
+    if min_size:
+        min_w, min_h = min_size
+        factor = max(1, min(w // max(1, min_w), h // max(1, min_h)))
+    if max_pixels:
+        factor = max(factor, int((w * h / max_pixels) ** 0.5))
+        while (w // factor) * (h // factor) > max_pixels:
+            factor += 1
+    return factor
+
+@cache
+def max_decode_pixels():
+    """Cap on decoded pixels per image (``max_decode_pixels`` in the runtime
+    config, CARDIOSCAN_MAX_DECODE_PIXELS), read once per process; larger
+    inputs are decoded at a reduced scale whatever resolution the caller
+    asked for. 0 disables the cap."""
+    return load_runtime_config()["max_decode_pixels"]
+
+def open_reduced(data, min_size=None, max_pixels=None):
+    """Decode image bytes to RGB near the resolution the caller needs.
+
+    JPEGs are decoded in draft mode, which lets libjpeg scale by 1/2, 1/4 or
+    1/8 during the DCT so the full-resolution raster is never allocated; any
+    remaining integer factor (and the whole factor for PNG and other formats)
+    is applied with ``Image.reduce``. The result is never smaller than
+    ``min_size`` (width, height; 0 means unconstrained) unless that would
+    exceed ``max_pixels`` (default: ``max_decode_pixels()``; 0 means no cap).
+    Returns (image, original size).
+    """
+    if max_pixels is None:
+        max_pixels = max_decode_pixels()
+    with Image.open(io.BytesIO(data)) as img:
+        full_size = img.size
+        factor = _reduction_factor(full_size, min_size, max_pixels)
+        if factor > 1:
+            # Only a hint: draft() picks the smallest DCT scale still >= this size
+            img.draft("RGB", (-(-full_size[0] // factor), -(-full_size[1] // factor)))
+        remaining = _reduction_factor(img.size, min_size, max_pixels)
+        if img.mode.startswith("I;16"):
+            # convert() clips 16-bit values to 255 (a white image); keep the high byte instead
+            img = Image.fromarray((np.asarray(img) >> 8).astype(np.uint8))
+        elif remaining > 1 and img.mode not in REDUCIBLE_MODES:
+            # reduce() rejects palette and 1-bit images
+            img = img.convert("RGB")
+        reduced = img.reduce(remaining) if remaining > 1 else img
+        return reduced.convert("RGB"), full_size
+
+class DecodedImage:
+    """An uploaded ECG decoded exactly once.
+
+    Holds the raw bytes (for display and hashing), the decoded RGB image (for
+    the classifier transforms) and lazily derived array views for processing.
+    The image may be decoded below its original resolution (see
+    ``open_reduced``); ``full_size`` records the original.
+    """
+
+    def __init__(self, data, image, full_size=None):
+        self.data = data
+        self.image = image
+        self.full_size = full_size or image.size
+
+    @classmethod
+    def from_file(cls, uploaded_file, min_size=None, max_pixels=None):
+        # Accepts Streamlit UploadedFile objects, other file-likes, bytes or a path
+        if isinstance(uploaded_file, (bytes, bytearray)):
+            data = bytes(uploaded_file)
+        elif hasattr(uploaded_file, "getvalue"):
+            data = uploaded_file.getvalue()
+        elif hasattr(uploaded_file, "read"):
+            uploaded_file.seek(0)
+            data = uploaded_file.read()
+        else:
+            with open(uploaded_file, "rb") as f:
+                data = f.read()
+
+        image, full_size = open_reduced(data, min_size, max_pixels)
+        return cls(data, image, full_size)
+
+    @classmethod
+    def from_array(cls, rgb):
+        # An already decoded RGB frame (e.g. from a camera); there are no file bytes
+        decoded = cls(None, Image.fromarray(rgb))
+        decoded.__dict__["rgb"] = rgb
+        return decoded
+
+    @property
+    def size(self):
+        return self.image.size
+
+    @cached_property
+    def rgb(self):
+        return np.asarray(self.image)
+
+    @cached_property
+    def gray(self):
+        return np.asarray(self.image.convert("L"))
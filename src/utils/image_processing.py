@@ -1,39 +1,126 @@
+import time
+from functools import cached_property
+
 import cv2
 import numpy as np
-import pandas as pd
-from PIL import Image
-
-def process_ecg_image(uploaded_file):
-    # Read image as grayscale
-    img_pil = Image.open(uploaded_file).convert("L")
-    img_np = np.array(img_pil)
-
-    # Resize for consistent processing
-    img_resized = cv2.resize(img_np, (1200, 800))  # width x height
-
-    # Divide into 12 leads (3 rows x 4 columns)
-    h, w = img_resized.shape
-    lead_height = h // 3
-    lead_width = w // 4
-
-    leads = []
-    signals = []
-    for row in range(3):
-        for col in range(4):
-            x1 = col * lead_width
-            y1 = row * lead_height
-            lead_img = img_resized[y1:y1+lead_height, x1:x1+lead_width]
-            leads.append(lead_img)
-
-            # Extract 1D signal using horizontal line profile from middle row
-            mid_row = lead_img.shape[0] // 2
-            signal = 255 - lead_img[mid_row, :]  # invert to make peaks go up
-            signal = (signal - np.min(signal)) / (np.max(signal) - np.min(signal) + 1e-8)  # normalize
-            signals.append(signal)
-
-    # Combine all signals into DataFrame
-    max_len = max(len(sig) for sig in signals)
-    signal_data = {f"Lead_{i+1}": np.pad(sig, (0, max_len - len(sig)), mode='constant') for i, sig in enumerate(signals)}
-    signal_df = pd.DataFrame(signal_data)
-
-    return signal_df, img_resized, leads
+
+from src.utils.decoding import DecodedImage, max_decode_pixels
+from src.utils.preprocess import ECGPreprocessor
+from src.utils.trace import LEAD_DURATION_S, resample_signals, trace_leads
+
+# ── Layout constants ─────────────────────────────────────────────────────
+PROCESS_SIZE = (1200, 800)  # width x height
+GRID_ROWS    = 3
+GRID_COLS    = 4
+LEAD_NAMES   = ['I', 'II', 'III', 'aVR', 'aVL', 'aVF', 'V1', 'V2', 'V3', 'V4', 'V5', 'V6']
+
+# Built once per process so its morphology kernels are shared by every call
+_preprocessor = ECGPreprocessor(lead_rows=GRID_ROWS)
+
+# Smallest decode that loses nothing: the preprocessor's working width and the
+# processing height. Larger scans are decoded reduced (see open_reduced)
+DECODE_SIZE = (_preprocessor.work_width, PROCESS_SIZE[1])
+
+# Version of ``ECGSignals`` and of the processing steps behind it; bump it
+# whenever either changes so results cached on disk are not served stale
+RESULT_FORMAT = 1
+
+def processing_signature(sample_rate=None, trace_method="centroid", localize=True):
+    """Everything besides the image that determines a ``process_ecg_image``
+    result, as a string for result cache keys."""
+    pre = _preprocessor
+    return (f"v{RESULT_FORMAT}|process={PROCESS_SIZE}|decode={DECODE_SIZE}|max_pixels={max_decode_pixels()}"
+            f"|rate={sample_rate}|trace={trace_method}|localize={localize}"
+            f"|pre={pre.work_width},{pre.min_band_fraction},{pre.line_fraction}")
+
+def split_leads(gray, rows=GRID_ROWS, cols=GRID_COLS):
+    """Zero-copy (rows, cols, lead_h, lead_w) view of a lead grid image."""
+    lead_h, lead_w = gray.shape[0] // rows, gray.shape[1] // cols
+    grid = gray[:rows * lead_h, :cols * lead_w]
+    return grid.reshape(rows, lead_h, cols, lead_w).swapaxes(1, 2)
+
+class ECGSignals:
+    """Array-backed result of ``process_ecg_image``.
+
+    ``signals`` is a float32 (12, samples) array of traced amplitudes, one row
+    per lead, sampled at ``sample_rate`` Hz; ``coverage`` is the fraction of
+    columns in each lead where a trace was actually found; ``timings`` holds
+    per-step durations in ms and ``rhythm_strip`` the cropped rhythm strip
+    when the printout has one. The lead crops are exposed as ``lead_grid``, a
+    zero-copy (rows, cols, h, w) view into ``gray``; ``leads`` flattens it to
+    (12, h, w), which NumPy can only do with a copy, so it is built once on
+    first access.
+    """
+
+    def __init__(self, signals, gray, sample_rate, coverage, timings=None, rhythm_strip=None):
+        self.signals = signals
+        self.gray = gray
+        self.sample_rate = sample_rate
+        self.coverage = coverage
+        self.timings = timings or {}
+        self.rhythm_strip = rhythm_strip
+
+    @property
+    def lead_grid(self):
+        return split_leads(self.gray)
+
+    @cached_property
+    def leads(self):
+        grid = self.lead_grid
+        return grid.reshape(-1, *grid.shape[2:])
+
+    @property
+    def nbytes(self):
+        leads = self.__dict__.get("leads")
+        strip = self.rhythm_strip
+        return (self.signals.nbytes + self.gray.nbytes + (leads.nbytes if leads is not None else 0)
+                + (strip.nbytes if strip is not None else 0))
+
+    def to_frame(self):
+        """Signals as a DataFrame with one ``Lead_<n>`` column per lead."""
+        import pandas as pd
+        columns = [f"Lead_{i+1}" for i in range(len(self.signals))]
+        time_s = pd.Index(np.arange(self.signals.shape[1]) / self.sample_rate, name="time_s")
+        return pd.DataFrame(self.signals.T, index=time_s, columns=columns)
+
+    def __getstate__(self):
+        # The flattened leads are derived from gray; don't store them twice
+        state = dict(self.__dict__)
+        state.pop("leads", None)
+        return state
+
+def process_ecg_image(image, sample_rate=None, trace_method="centroid", localize=True):
+    """Segment an ECG printout into 12 leads and trace each lead's waveform.
+
+    With ``localize`` the background grid is suppressed and lead rows are
+    found from projection profiles (see ``ECGPreprocessor``); otherwise the
+    whole image is resized and cut into a fixed 3x4 grid. ``sample_rate`` (Hz)
+    resamples every lead to ``sample_rate * 2.5 s`` samples; by default there
+    is one sample per pixel column.
+    """
+    # Reuse an already decoded upload, or decode the file once here
+    if not isinstance(image, DecodedImage):
+        image = DecodedImage.from_file(image, min_size=DECODE_SIZE)
+
+    if localize:
+        gray, rhythm_strip, timings = _preprocessor.normalize(image.rgb, PROCESS_SIZE)
+    else:
+        # Resize for consistent processing
+        start = time.perf_counter()
+        gray = cv2.resize(image.gray, PROCESS_SIZE)
+        rhythm_strip, timings = None, {"resize": (time.perf_counter() - start) * 1000.0}
+    start = time.perf_counter()
+
+    # Divide into 12 leads (3 rows x 4 columns) as one strided view
+    grid = split_leads(gray)
+
+    # Trace the waveform column by column in all 12 leads at once
+    amplitude, coverage = trace_leads(grid, trace_method)
+    signals = amplitude.reshape(GRID_ROWS * GRID_COLS, -1)
+    coverage = coverage.reshape(-1)
+
+    native_rate = signals.shape[1] / LEAD_DURATION_S
+    if sample_rate and sample_rate != native_rate:
+        signals = resample_signals(signals, int(round(sample_rate * LEAD_DURATION_S)))
+    timings["trace"] = (time.perf_counter() - start) * 1000.0
+    return ECGSignals(signals, gray, sample_rate or native_rate, coverage, timings, rhythm_strip)
@@ -0,0 +1,201 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from src.utils.decoding import DecodedImage
+from src.utils.image_processing import process_ecg_image
+from src.utils.quality import assess_quality
+
+IDLE_TIMEOUT_S = 10.0
+
+# ── Frame hand-off ───────────────────────────────────────────────────────
+class FrameSlot:
+    """Single-frame mailbox between the camera and the analysis thread.
+
+    ``put`` replaces whatever frame is waiting, so a slow consumer always
+    gets the newest frame and stale ones are dropped instead of queued.
+    """
+
+    def __init__(self):
+        self._frame = None
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, frame):
+        with self._cond:
+            if self._frame is not None:
+                self.dropped += 1
+            self._frame = frame
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            if self._frame is None:
+                self._cond.wait(timeout)
+            frame, self._frame = self._frame, None
+            return frame
+
+class RateMeter:
+    """Events per second over a sliding window."""
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self._times = deque()
+
+    def tick(self):
+        now = time.perf_counter()
+        self._times.append(now)
+        while self._times[0] < now - self.window:
+            self._times.popleft()
+
+    @property
+    def rate(self):
+        times = list(self._times)
+        if len(times) < 2 or times[-1] < time.perf_counter() - self.window:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+# ── Live analysis ────────────────────────────────────────────────────────
+class LiveAnalyzer:
+    """Continuously analyzes frames from a camera on two threads.
+
+    The capture thread reads frames at the camera's rate into a ``FrameSlot``.
+    The analysis thread takes the newest frame, runs the ``assess_quality``
+    gate and, only for frames that pass, ``process_ecg_image`` and the
+    classifier.
+    ``snapshot()`` returns the latest frame, result and stats for display.
+    If nobody has called it for ``idle_timeout`` seconds (the viewer closed
+    the tab or the session expired), both threads stop and release the camera.
+    """
+
+    def __init__(self, predictor, transform, source=0, idle_timeout=IDLE_TIMEOUT_S):
+        self.predictor = predictor
+        self.transform = transform
+        self.source = source
+        self.idle_timeout = idle_timeout
+        self.holders = 0
+        self._last_poll = time.monotonic()
+        self.slot = FrameSlot()
+        self.capture_rate = RateMeter()
+        self.analysis_rate = RateMeter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._state = {"frame": None, "ok": False, "reason": "starting camera...",
+                       "probs": None, "latency": {}, "error": None}
+
+    def start(self):
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="live-capture", daemon=True),
+            threading.Thread(target=self._analysis_loop, name="live-analysis", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=2.0)
+
+    @property
+    def running(self):
+        return any(t.is_alive() for t in self._threads)
+
+    def snapshot(self):
+        self._last_poll = time.monotonic()
+        with self._lock:
+            state = dict(self._state)
+        state["capture_fps"] = self.capture_rate.rate
+        state["analysis_fps"] = self.analysis_rate.rate
+        state["dropped"] = self.slot.dropped
+        return state
+
+    def _update(self, **kwargs):
+        with self._lock:
+            self._state.update(kwargs)
+
+    def _capture_loop(self):
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            self._update(error=f"Cannot open camera {self.source!r}")
+            self._stop.set()
+            return
+        try:
+            while not self._stop.is_set():
+                ok, bgr = cap.read()
+                if not ok:
+                    self._update(error="Camera stopped delivering frames")
+                    break
+                self.capture_rate.tick()
+                self.slot.put(bgr)
+        finally:
+            cap.release()
+            self._stop.set()
+
+    def _analysis_loop(self):
+        while not self._stop.is_set():
+            if time.monotonic() - self._last_poll > self.idle_timeout:
+                self._update(error=f"Live analysis stopped after {self.idle_timeout:.0f} s without a viewer")
+                self._stop.set()
+                break
+            bgr = self.slot.get(timeout=0.5)
+            if bgr is None:
+                continue
+            rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+
+            start = time.perf_counter()
+            quality = assess_quality(cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY))
+            latency = {"check": (time.perf_counter() - start) * 1000.0}
+            if not quality.ok:
+                self._update(frame=rgb, ok=False, reason=quality.reason, latency=latency)
+                continue
+
+            try:
+                start = time.perf_counter()
+                decoded = DecodedImage.from_array(rgb)
+                ecg = process_ecg_image(decoded)
+                latency["process"] = (time.perf_counter() - start) * 1000.0
+
+                start = time.perf_counter()
+                probs = self.predictor.predict(self.transform(decoded.image))
+                latency["classify"] = (time.perf_counter() - start) * 1000.0
+            except Exception as e:
+                self._update(frame=rgb, ok=False, reason=f"{type(e).__name__}: {e}", latency=latency)
+                continue
+
+            self.analysis_rate.tick()
+            self._update(frame=rgb, ok=True, reason="", probs=probs, ecg=ecg, latency=latency)
+
+# ── Shared analyzers ─────────────────────────────────────────────────────
+_shared = {}
+_shared_lock = threading.Lock()
+
+def acquire_analyzer(predictor, transform, source=0, idle_timeout=IDLE_TIMEOUT_S):
+    """The running analyzer for ``source``, started on first use.
+
+    A camera can only be opened once, so all sessions share one analyzer
+    per source; each ``acquire_analyzer`` must be paired with a
+    ``release_analyzer``. Holders that vanish without releasing (closed
+    tabs) are covered by the idle timeout, after which the next acquire
+    starts a fresh analyzer.
+    """
+    with _shared_lock:
+        analyzer = _shared.get(source)
+        if analyzer is None or not analyzer.running:
+            analyzer = LiveAnalyzer(predictor, transform, source, idle_timeout).start()
+            _shared[source] = analyzer
+        analyzer.holders += 1
+        return analyzer
+
+def release_analyzer(analyzer):
+    """Drop one hold on ``analyzer``; the last one stops it."""
+    with _shared_lock:
+        analyzer.holders -= 1
+        if analyzer.holders > 0:
+            return
+        if _shared.get(analyzer.source) is analyzer:
+            del _shared[analyzer.source]
+    analyzer.stop()
@@ -0,0 +1,29 @@
+import glob
+import os
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+def collect_image_paths(inputs, file_list=None):
+    """Expand directories, glob patterns and plain paths into a sorted list of images."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.extend(
+                    os.path.join(root, f) for f in files
+                    if f.lower().endswith(IMAGE_EXTENSIONS)
+                )
+        elif glob.has_magic(item):
+            paths.extend(
+                p for p in glob.glob(item, recursive=True)
+                if p.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        else:
+            paths.append(item)
+
+    if file_list:
+        with open(file_list) as f:
+            paths.extend(line.strip() for line in f if line.strip())
+
+    # Deduplicate while keeping a stable order between runs
+    return sorted(set(paths))
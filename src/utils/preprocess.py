@@ -0,0 +1,155 @@
+import time
+
+import cv2
+import numpy as np
+
+class ECGPreprocessor:
+    """Grid suppression and lead localization for scanned or photographed ECGs.
+
+    Steps, each timed in ``timings`` (ms):
+
+    1. ``resize``        - scale to a fixed working width so kernel sizes hold
+    2. ``color_filter``  - take the max over RGB channels, which turns pink/red
+                           millimetre grids near-white while the dark trace stays dark
+    3. ``threshold``     - Otsu-binarize the remaining ink
+    4. ``grid_removal``  - rows/columns that are mostly ink and contain a long
+                           unbroken run are grid lines or borders and are erased
+                           (the flat baseline between beats is mostly ink too, but
+                           broken up by every complex); a small morphological
+                           closing then repairs the trace where it crossed them
+    5. ``localize``      - row/column projection profiles of the remaining ink
+                           give the lead rows, an optional rhythm strip and the
+                           horizontal extent of the leads
+
+    Kernels are built once in ``__init__`` and reused for every image.
+    """
+
+    def __init__(self, work_width=1600, lead_rows=3, min_band_fraction=0.1, line_fraction=0.5):
+        self.work_width = work_width
+        self.lead_rows = lead_rows
+        self.min_band_fraction = min_band_fraction
+        self.line_fraction = line_fraction
+        self.min_run = work_width // 8
+        self.repair_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        self.smooth_len = max(3, work_width // 100)
+        self.smooth_kernel = np.ones(self.smooth_len, dtype=np.float32) / self.smooth_len
+
+    def __call__(self, image):
+        """Return (clean gray image, row bands, (x0, x1), rhythm band or None, timings)."""
+        timings = {}
+        t = time.perf_counter()
+
+        def lap(name):
+            nonlocal t
+            now = time.perf_counter()
+            timings[name] = (now - t) * 1000.0
+            t = now
+
+        h, w = image.shape[:2]
+        scale = self.work_width / w
+        image = cv2.resize(image, (self.work_width, max(1, round(h * scale))),
+                           interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+        lap("resize")
+
+        if image.ndim == 3:
+            r, g, b = cv2.split(image)
+            gray = cv2.max(cv2.max(r, g), b)
+        else:
+            gray = image
+        lap("color_filter")
+
+        _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+        lap("threshold")
+
+        # Find both line sets before erasing either: removing horizontal lines
+        # first would cut every vertical line into short runs
+        rows, cols = self._lines(ink), self._lines(ink.T)
+        ink[rows, :] = 0
+        ink[:, cols] = 0
+        ink = cv2.morphologyEx(ink, cv2.MORPH_CLOSE, self.repair_kernel)
+        clean = np.where(ink > 0, gray, 255).astype(np.uint8)
+        lap("grid_removal")
+
+        bands, x_range, y_range = self._localize(ink)
+        rhythm = None
+        if len(bands) == self.lead_rows + 1:
+            # A full-width strip below the lead grid is the rhythm strip
+            bands, rhythm = bands[:-1], bands[-1]
+        elif len(bands) != self.lead_rows:
+            # Rows could not be told apart: split the inked extent evenly
+            y0, y1 = y_range
+            step = (y1 - y0) / self.lead_rows
+            bands = [(round(y0 + i * step), round(y0 + (i + 1) * step)) for i in range(self.lead_rows)]
+        lap("localize")
+
+        return clean, bands, x_range, rhythm, timings
+
+    def normalize(self, image, out_size):
+        """Rebuild the leads as a canonical grid image of ``out_size`` (width, height).
+
+        Each detected lead row is cropped to the leads' horizontal extent and
+        resized to an equal-height band, so fixed-grid code downstream sees
+        leads where it expects them. Returns (grid image, rhythm strip or
+        None, timings).
+        """
+        clean, bands, (x0, x1), rhythm, timings = self(image)
+        t = time.perf_counter()
+
+        out_w, out_h = out_size
+        band_h = out_h // self.lead_rows
+        canvas = np.full((out_h, out_w), 255, dtype=np.uint8)
+        for i, (a, b) in enumerate(bands):
+            canvas[i * band_h:(i + 1) * band_h] = cv2.resize(
+                clean[a:b, x0:x1], (out_w, band_h), interpolation=cv2.INTER_AREA)
+        # A copy, so results don't keep the whole working image alive
+        strip = clean[rhythm[0]:rhythm[1], x0:x1].copy() if rhythm else None
+
+        timings["assemble"] = (time.perf_counter() - t) * 1000.0
+        return canvas, strip, timings
+
+    def _lines(self, ink):
+        """Rows of ``ink`` that are grid lines: mostly ink, with a run of at least min_run."""
+        lines = cv2.reduce(ink, 1, cv2.REDUCE_AVG).ravel() > 255 * self.line_fraction
+        candidates = np.flatnonzero(lines)
+        if len(candidates) and ink.shape[1] > self.min_run:
+            # Only the few candidate rows get the run-length test
+            run = np.zeros((len(candidates), ink.shape[1] + 1), dtype=np.int32)
+            np.cumsum(ink[candidates] > 0, axis=1, out=run[:, 1:])
+            longest = (run[:, self.min_run:] - run[:, :-self.min_run]).max(axis=1)
+            lines[candidates] = longest >= self.min_run
+        return lines
+
+    def _smooth(self, profile):
+        return np.convolve(profile.astype(np.float32), self.smooth_kernel, mode="same")
+
+    def _localize(self, ink):
+        rows = self._smooth((ink > 0).sum(axis=1))
+        if rows.max() == 0:
+            return [], (0, ink.shape[1]), (0, ink.shape[0])
+
+        # Horizontal extent: every column with any ink, since a fraction of the
+        # peak (a QRS column) would cut off the flat baseline at both ends. Stray
+        # marks are dropped by keeping the run of inked columns, bridging gaps
+        # narrower than the smoothing window, that holds the most ink.
+        counts = (ink > 0).sum(axis=0)
+        inked = np.flatnonzero(counts)
+        runs = np.split(inked, np.flatnonzero(np.diff(inked) > self.smooth_len) + 1)
+        xs = max(runs, key=lambda run: counts[run].sum())
+        ys = np.flatnonzero(rows > rows.max() * self.min_band_fraction)
+        x_range = (int(xs[0]), int(xs[-1]) + 1)
+        y_range = (int(ys[0]), int(ys[-1]) + 1)
+
+        # Lead rows: runs of the row profile above a fraction of its peak,
+        # dropping slivers (labels, stray marks) much thinner than a lead row
+        active = rows > rows.max() * self.min_band_fraction
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], active.astype(np.int8), [0]))))
+        bands = [(int(a), int(b)) for a, b in zip(edges[::2], edges[1::2])]
+        tallest = max(b - a for a, b in bands)
+        bands = [(a, b) for a, b in bands if b - a >= tallest / 4]
+
+        # The profile threshold clips low-amplitude trace at the top and bottom
+        # of each row; grow every band by half the gap to its neighbours
+        gaps = [bands[i + 1][0] - bands[i][1] for i in range(len(bands) - 1)]
+        pad = int(np.median(gaps)) // 2 if gaps else 0
+        bands = [(max(0, a - pad), min(len(rows), b + pad)) for a, b in bands]
+        return bands, x_range, y_range
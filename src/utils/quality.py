@@ -0,0 +1,116 @@
+import time
+
+import cv2
+import numpy as np
+
+# ── Thresholds ───────────────────────────────────────────────────────────
+QUALITY_WIDTH = 512            # checks run on a thumbnail about this wide (at least)
+ASPECT_RANGE  = (1.0, 2.5)     # width / height of a landscape printout
+MIN_SHARPNESS = 100.0          # variance of the Laplacian on the thumbnail
+MIN_BRIGHTNESS = 70            # median grey level of the paper
+INK_RANGE     = (0.003, 0.30)  # fraction of pixels that are trace ink
+MIN_INK_SPAN  = 0.6            # fraction of the width the trace must cover
+MAX_TRACE_RUNS = 10            # ink runs per column: one per lead row, plus labels and strips
+MIN_TRACE_COLUMNS = 0.5        # fraction of the inked span whose columns look like traces
+
+class QualityReport:
+    """Outcome of ``assess_quality``: ``ok``, the human-readable ``reasons`` for
+    a rejection, the ``metrics`` computed before it stopped and the time the
+    checks took in ms."""
+
+    def __init__(self, reasons, metrics, elapsed_ms):
+        self.reasons = reasons
+        self.metrics = metrics
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def ok(self):
+        return not self.reasons
+
+    @property
+    def reason(self):
+        return "; ".join(self.reasons)
+
+def grid_score(thumb):
+    """Strength of the vertical lines of a background grid.
+
+    The per-column median ignores the trace, which crosses any column in only
+    a few rows, but keeps grid lines, which run the full height; the score is
+    the mean high-frequency variation of that profile in grey levels. ECG
+    paper scores several levels, plain paper near zero.
+    """
+    profile = np.median(thumb[::4], axis=0).astype(np.float32)
+    smooth = np.convolve(profile, np.ones(9, dtype=np.float32) / 9, mode="same")
+    return float(np.abs(profile - smooth)[5:-5].mean())
+
+def trace_columns(ink):
+    """Fraction of the inked span's columns that cut through a few thin lines.
+
+    A column of an ECG printout crosses each lead row's trace once, a short
+    run of ink a pixel or two thick (the steep QRS strokes are the exception,
+    but only over a few columns). Text, tables and noise give dozens of runs
+    per column, photos and filled shapes thick ones.
+    """
+    starts = np.count_nonzero(ink[1:] & ~ink[:-1], axis=0) + ink[0]
+    counts = np.count_nonzero(ink, axis=0)
+    max_thickness = max(2.0, ink.shape[1] / 128)
+    trace = (starts >= 1) & (starts <= MAX_TRACE_RUNS) & (counts <= max_thickness * starts)
+    cols = np.flatnonzero(counts)
+    return float(trace[cols[0]:cols[-1] + 1].mean())
+
+def assess_quality(gray):
+    """Decide in a few milliseconds whether a grayscale ECG image is worth analyzing.
+
+    Runs on a thumbnail at least QUALITY_WIDTH wide and stops at the first failed
+    check, cheapest first: aspect ratio, exposure (histogram median), trace
+    presence (a plausible fraction of ink clearly darker than the paper),
+    blur (variance of the Laplacian), framing (the trace spans most of the
+    width) and trace structure (most columns cross a few thin lines, see
+    ``trace_columns``), which turns away text pages, tables, noise and
+    photos. A background grid is measured but not required, since gridless
+    printouts are valid input.
+    """
+    start = time.perf_counter()
+    h, w = gray.shape[:2]
+    metrics = {"aspect_ratio": w / h}
+
+    def report(reason=None):
+        return QualityReport([reason] if reason else [], metrics, (time.perf_counter() - start) * 1000.0)
+
+    if metrics["aspect_ratio"] < ASPECT_RANGE[0]:
+        return report("image is in portrait orientation - rotate or capture the printout in landscape")
+    if metrics["aspect_ratio"] > ASPECT_RANGE[1]:
+        return report("image is too wide to be a 12-lead printout - is it cropped?")
+
+    # An integer shrink factor takes OpenCV's much faster INTER_AREA path
+    f = max(1, w // QUALITY_WIDTH)
+    thumb = cv2.resize(gray[:h - h % f, :w - w % f], (w // f, h // f), interpolation=cv2.INTER_AREA)
+    hist = cv2.calcHist([thumb], [0], None, [256], [0, 256]).ravel()
+    median = int(np.searchsorted(np.cumsum(hist), hist.sum() / 2))
+    metrics["median_brightness"] = median
+    if median < MIN_BRIGHTNESS:
+        return report("image is too dark - add light or avoid shadows")
+
+    # Ink: clearly darker than the paper
+    ink = thumb < min(median - 80, 128)
+    metrics["ink_fraction"] = float(ink.mean())
+    if metrics["ink_fraction"] < INK_RANGE[0]:
+        return report("no ECG trace found - the image may be overexposed or not an ECG")
+    if metrics["ink_fraction"] > INK_RANGE[1]:
+        return report("image is too cluttered to be an ECG printout")
+
+    metrics["sharpness"] = float(cv2.Laplacian(thumb, cv2.CV_32F).var())
+    if metrics["sharpness"] < MIN_SHARPNESS:
+        return report("image is blurry - hold the camera steady and focus on the printout")
+
+    cols = np.flatnonzero(ink.any(axis=0))
+    metrics["ink_span"] = float((cols[-1] - cols[0] + 1) / thumb.shape[1])
+    if metrics["ink_span"] < MIN_INK_SPAN:
+        return report("the trace covers only part of the image - capture the whole printout")
+
+    metrics["trace_columns"] = trace_columns(ink)
+    if metrics["trace_columns"] < MIN_TRACE_COLUMNS:
+        return report("no ECG waveforms found - the image does not look like an ECG printout")
+
+    metrics["grid_score"] = grid_score(thumb)
+    return report()
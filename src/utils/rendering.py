@@ -0,0 +1,81 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+# ── Decimation ───────────────────────────────────────────────────────────
+def minmax_decimate(signals, max_points=1000):
+    """Min/max envelope decimation of a (leads, samples) array.
+
+    Every bucket of samples becomes two points, its minimum and maximum, so
+    QRS peaks survive no matter how far the signal is reduced. All leads share
+    the same x positions, which keeps the result a single wide table.
+    Returns (x, decimated) with decimated of shape (leads, <= max_points).
+    """
+    signals = np.asarray(signals)
+    n_leads, n = signals.shape
+    if n <= max_points:
+        return np.arange(n), signals
+
+    bucket = -(-n // (max_points // 2))  # ceil division
+    n_buckets = -(-n // bucket)
+    pad = n_buckets * bucket - n
+    # Edge padding repeats the last sample, which never changes a bucket's min/max
+    padded = np.pad(signals, ((0, 0), (0, pad)), mode="edge")
+    buckets = padded.reshape(n_leads, n_buckets, bucket)
+
+    out = np.empty((n_leads, n_buckets * 2), dtype=signals.dtype)
+    out[:, 0::2] = buckets.min(axis=2)
+    out[:, 1::2] = buckets.max(axis=2)
+
+    starts = np.arange(n_buckets) * bucket
+    x = np.empty(n_buckets * 2, dtype=np.int64)
+    x[0::2] = starts
+    x[1::2] = np.minimum(starts + bucket // 2, n - 1)
+    return x, out
+
+def chart_frame(signals, lead_labels, max_points=1000):
+    """Wide DataFrame for Streamlit's native line chart, decimated to ``max_points`` rows.
+
+    The app's leads have 300 samples (one per pixel column), which are charted
+    as-is; decimation only applies when a ``sample_rate`` above 400 Hz
+    resamples leads to more than ``max_points`` samples.
+    """
+    x, decimated = minmax_decimate(signals, max_points)
+    return pd.DataFrame(decimated.T, index=pd.Index(x, name="Sample"), columns=lead_labels)
+
+# ── Export-only matplotlib rendering ─────────────────────────────────────
+def render_signals_png(signals, lead_labels, dpi=150):
+    """Full-resolution waveform figure as PNG bytes, in the app's dark style.
+
+    Uses the object-oriented Figure API rather than pyplot, so it keeps no
+    global figure state and is safe to call from concurrent sessions.
+    """
+    import matplotlib
+    import matplotlib.style
+    from matplotlib.figure import Figure
+
+    with matplotlib.style.context("dark_background"):
+        fig = Figure(figsize=(12, 6))
+        ax = fig.subplots()
+        fig.patch.set_facecolor('#0D1B2A')
+        ax.set_facecolor('#0D1B2A')
+
+        colors = matplotlib.colormaps["rainbow"](np.linspace(0, 1, len(lead_labels)))
+        for i, label in enumerate(lead_labels):
+            ax.plot(signals[i], label=label, color=colors[i], alpha=0.8, linewidth=1.2)
+
+        ax.legend(ncol=6, fontsize="small", loc='upper center', bbox_to_anchor=(0.5, -0.1))
+        ax.set_xlabel("Time", color='#A8DADC', fontsize=11)
+        ax.set_ylabel("Normalized Amplitude", color='#A8DADC', fontsize=11)
+        ax.tick_params(colors='#A8DADC')
+        ax.spines['bottom'].set_color('#457B9D')
+        ax.spines['left'].set_color('#457B9D')
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax.grid(True, alpha=0.2, color='#457B9D')
+        fig.tight_layout()
+
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=dpi, facecolor=fig.get_facecolor())
+    return buf.getvalue()
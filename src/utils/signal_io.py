@@ -0,0 +1,186 @@
+import io
+import json
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+SIGNAL_FORMAT = 1
+ENCODINGS     = ("int16", "float32")
+IPC_EXTENSIONS     = (".arrow", ".feather", ".ipc")
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+
+def quantize(signals, encoding="int16"):
+    """Encode (..., samples) float signals; returns (values, per-series scale).
+
+    ``int16`` maps each series' peak magnitude to 32767, so every lead keeps
+    the full 16-bit range whatever its amplitude; ``float32`` stores values
+    as-is with a scale of 1. Decode with ``values * scale[..., None]``.
+    """
+    signals = np.asarray(signals, dtype=np.float32)
+    if encoding == "float32":
+        return signals, np.ones(signals.shape[:-1], dtype=np.float32)
+    if encoding != "int16":
+        raise ValueError(f"Unknown signal encoding '{encoding}', expected one of {ENCODINGS}")
+    peak = np.abs(np.nan_to_num(signals)).max(axis=-1)
+    scale = np.where(peak > 0, peak / 32767.0, 1.0).astype(np.float32)
+    values = np.rint(np.nan_to_num(signals) / scale[..., None]).astype(np.int16)
+    return values, scale
+
+def _file_format(path, fmt=None):
+    if fmt:
+        return fmt
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext in IPC_EXTENSIONS:
+        return "arrow"
+    if ext in PARQUET_EXTENSIONS:
+        return "parquet"
+    raise ValueError(f"Cannot infer signal file format from '{path}', use .arrow or .parquet")
+
+class SignalWriter:
+    """Streams 12-lead signals to an Arrow IPC or Parquet file.
+
+    One row per (record, lead): ``record`` (e.g. the source path), ``lead``,
+    ``scale``, ``coverage`` and ``samples``, a fixed-size list of int16 or
+    float32 values. Sample rate, sample count and encoding are stored in
+    the schema metadata. ``write`` can be called once per batch, so batch
+    jobs never hold more than one chunk of results.
+    """
+
+    def __init__(self, sink, lead_names, n_samples, sample_rate, encoding="int16", fmt=None):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown signal encoding '{encoding}', expected one of {ENCODINGS}")
+        self.lead_names = list(lead_names)
+        self.n_samples = n_samples
+        self.encoding = encoding
+        self.fmt = _file_format(sink, fmt)
+
+        value_type = pa.int16() if encoding == "int16" else pa.float32()
+        metadata = {
+            "cardioscan.signals": json.dumps({
+                "format": SIGNAL_FORMAT,
+                "encoding": encoding,
+                "sample_rate": sample_rate,
+                "n_samples": n_samples,
+                "lead_names": self.lead_names,
+            })
+        }
+        self.schema = pa.schema([
+            ("record",   pa.string()),
+            ("lead",     pa.dictionary(pa.int8(), pa.string())),
+            ("scale",    pa.float32()),
+            ("coverage", pa.float32()),
+            ("samples",  pa.list_(value_type, n_samples)),
+        ], metadata=metadata)
+
+        if self.fmt == "arrow":
+            # Uncompressed IPC, so readers can memory-map the sample buffers as-is
+            self._writer = ipc.new_file(sink, self.schema)
+        else:
+            # Dictionary-encoding the sample values only bloats them
+            self._writer = pq.ParquetWriter(sink, self.schema, compression="zstd",
+                                            use_dictionary=["record", "lead"])
+        self._lead_dict = pa.array(self.lead_names)
+
+    def write(self, records, signals, coverage=None):
+        """Append signals of shape (records, leads, samples)."""
+        signals = np.asarray(signals)
+        n_records, n_leads, n_samples = signals.shape
+        if n_samples != self.n_samples:
+            raise ValueError(f"Expected {self.n_samples} samples per lead, got {n_samples}")
+        values, scale = quantize(signals, self.encoding)
+        if coverage is None:
+            coverage = np.ones((n_records, n_leads), dtype=np.float32)
+
+        rows = n_records * n_leads
+        lead_idx = np.tile(np.arange(n_leads, dtype=np.int8), n_records)
+        batch = pa.record_batch([
+            pa.array(np.repeat(np.asarray(records, dtype=object), n_leads), pa.string()),
+            pa.DictionaryArray.from_arrays(pa.array(lead_idx), self._lead_dict),
+            pa.array(scale.reshape(rows)),
+            pa.array(np.asarray(coverage, dtype=np.float32).reshape(rows)),
+            pa.FixedSizeListArray.from_arrays(pa.array(values.reshape(-1)), n_samples),
+        ], schema=self.schema)
+        self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_signals(path, records, signals, lead_names, sample_rate, coverage=None,
+                  encoding="int16", fmt=None):
+    """Write (records, leads, samples) signals to ``path`` in one go."""
+    signals = np.asarray(signals)
+    with SignalWriter(path, lead_names, signals.shape[-1], sample_rate, encoding, fmt) as writer:
+        writer.write(records, signals, coverage)
+
+def signals_to_bytes(signals, lead_names, sample_rate, record="ecg", fmt="parquet",
+                     encoding="int16", coverage=None):
+    """One recording's (leads, samples) signals as an in-memory Arrow/Parquet file."""
+    buf = io.BytesIO()
+    write_signals(buf, [record], np.asarray(signals)[None], lead_names, sample_rate,
+                  None if coverage is None else np.asarray(coverage)[None], encoding, fmt)
+    return buf.getvalue()
+
+class SignalTable:
+    """Signals read back from a ``SignalWriter`` file.
+
+    ``values`` is a (rows, samples) NumPy view of the stored int16/float32
+    buffer (zero-copy for Arrow IPC files, which are memory-mapped), and
+    ``scale`` the per-row scale; ``signals()`` dequantizes to float32.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        meta = json.loads(table.schema.metadata[b"cardioscan.signals"])
+        self.encoding = meta["encoding"]
+        self.sample_rate = meta["sample_rate"]
+        self.n_samples = meta["n_samples"]
+        self.lead_names = meta["lead_names"]
+
+    def __len__(self):
+        return self.table.num_rows
+
+    @property
+    def records(self):
+        return self.table.column("record").to_numpy(zero_copy_only=False)
+
+    @property
+    def leads(self):
+        return self.table.column("lead").to_numpy(zero_copy_only=False)
+
+    @property
+    def scale(self):
+        return self.table.column("scale").to_numpy()
+
+    @property
+    def values(self):
+        column = self.table.column("samples")
+        # A single chunk (one written batch, or a freshly read Parquet file)
+        # is viewed in place; several chunks have to be concatenated
+        samples = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+        return samples.flatten().to_numpy().reshape(-1, self.n_samples)
+
+    def signals(self):
+        return self.values.astype(np.float32) * self.scale[:, None]
+
+    def record(self, record):
+        """(leads, samples) float32 signals of one record."""
+        return SignalTable(self.table.filter(pc.equal(self.table.column("record"), record))).signals()
+
+def read_signals(path, memory_map=True):
+    """Open a signal file written by ``SignalWriter``."""
+    if _file_format(path) == "arrow":
+        source = pa.memory_map(path) if memory_map else pa.OSFile(path)
+        table = ipc.open_file(source).read_all()
+    else:
+        table = pq.read_table(path, memory_map=memory_map)
+    return SignalTable(table)